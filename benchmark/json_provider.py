@@ -0,0 +1,62 @@
+"""Benchmark of the JSON responses of the default provider and of the orjson provider:
+$ python -m benchmark.json_provider [rows]
+"""
+import sys
+import timeit
+from datetime import datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from uniride_sme import app
+from uniride_sme.utils.json_provider import ORJSONProvider
+
+
+def _trips(count):
+    """Get trip DTOs like the ones of the trip search"""
+    return [
+        {
+            "trip_id": i,
+            "address": {
+                "departure": {
+                    "id": i,
+                    "latitude": 48.85,
+                    "longitude": 2.42,
+                    "address_name": "140 Rue, Montreuil, 93100",
+                },
+                "arrival": {
+                    "id": i,
+                    "latitude": 48.86,
+                    "longitude": 2.34,
+                    "address_name": "1 Rue de Rivoli, Paris, 75001",
+                },
+                "distance": 1.2,
+            },
+            "driver_id": 3,
+            "price": 4.5,
+            "proposed_date": datetime(2024, 1, 15, 8, 30),
+            "total_passenger_count": 3,
+        }
+        for i in range(count)
+    ]
+
+
+def _users(count):
+    """Get user rows like the ones of the admin ranking"""
+    return [
+        {"user": {"id": i, "lastname": "Doe", "firstname": "John"}, "average": Decimal("4.50"), "rank": i}
+        for i in range(count)
+    ]
+
+
+def main(count=1000, number=50):
+    """Print the time of a response with each provider"""
+    with app.app_context():
+        for name, data in (("trips", _trips(count)), ("users", _users(count))):
+            for provider in (DefaultJSONProvider(app), ORJSONProvider(app)):
+                duration = min(timeit.repeat(lambda p=provider, d=data: p.response(d), number=number, repeat=5))
+                print(f"{name:<8}{type(provider).__name__:<22}{duration / number * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,49 @@
+"""Benchmark of the user lookup of the authentication, run against the configured database:
+$ python -m benchmark.login_lookup <login> <student_email> [iterations]
+"""
+import statistics
+import sys
+import time
+
+from uniride_sme import app
+from uniride_sme.rest_api import create_app
+from uniride_sme.service import user_service
+from uniride_sme.utils.exception.user_exceptions import UserNotFoundException
+
+
+def _legacy_lookup(identifier):
+    """Lookup of the authentication before the single query: by login, then by email"""
+    try:
+        return user_service.get_user_by_login(identifier, with_password=True)
+    except UserNotFoundException:
+        return user_service.get_user_by_email(identifier, with_password=True)
+
+
+def _single_lookup(identifier):
+    """Lookup of the authentication in a single query"""
+    return user_service.get_user_by_login_or_email(identifier, with_password=True)
+
+
+def _measure(lookup, identifier, iterations):
+    """Get the durations of the lookups, in milliseconds"""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        lookup(identifier)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main(login, student_email, iterations=200):
+    """Print the p50 and p99 of both lookups, with a login and with an email"""
+    create_app()
+    with app.app_context():
+        for name, identifier in (("login", login), ("email", student_email)):
+            for lookup in (_legacy_lookup, _single_lookup):
+                durations = _measure(lookup, identifier, iterations)
+                percentiles = statistics.quantiles(durations, n=100)
+                print(f"{name:<6}{lookup.__name__:<16}p50={percentiles[49]:.2f}ms p99={percentiles[98]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], sys.argv[2], *(int(arg) for arg in sys.argv[3:4]))
@@ -0,0 +1,32 @@
+"""Benchmark of the startup of a process, the import of the application then its creation:
+$ python -m benchmark.startup [runs]
+"""
+import statistics
+import subprocess
+import sys
+
+_CHILD = """
+import time
+start = time.perf_counter()
+from uniride_sme.rest_api import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(imported - start, created - imported)
+"""
+
+
+def main(runs=20):
+    """Print the median import and creation times of fresh processes"""
+    imports, creations = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _CHILD], capture_output=True, check=True, text=True).stdout
+        import_time, creation_time = map(float, output.split()[-2:])
+        imports.append(import_time * 1000)
+        creations.append(creation_time * 1000)
+    print(f"import   median={statistics.median(imports):.1f}ms")
+    print(f"create   median={statistics.median(creations):.1f}ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
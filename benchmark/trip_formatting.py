@@ -0,0 +1,147 @@
+"""Benchmark of the formatting of the trip rows into DTOs, without a database:
+$ python -m benchmark.trip_formatting [rows]
+"""
+import dataclasses
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from uniride_sme.model.bo.address_bo import AddressBO
+from uniride_sme.model.dto.address_dto import AddressSimpleDTO
+from uniride_sme.model.dto.trip_dto import TripDTO
+from uniride_sme.service.trip_service import format_get_current_driver_trips
+
+
+@dataclasses.dataclass
+class _DictAddressBO:  # pylint: disable=too-many-instance-attributes
+    """AddressBO before it was slotted"""
+
+    id: str = None
+    street_number: str = None
+    street_name: str = None
+    city: str = None
+    postal_code: str = None
+    latitude: float = None
+    longitude: float = None
+
+    def get_full_address(self) -> str:
+        """Return a simple concatenated full address string"""
+        return f"{self.street_number} {self.street_name}, {self.city}, {self.postal_code}"
+
+
+@dataclasses.dataclass
+class _DictTripBO:  # pylint: disable=too-many-instance-attributes
+    """TripBO before it was slotted"""
+
+    id: int = None
+    timestamp_proposed: datetime = None
+    status: int = None
+    price: float = None
+    user_id: int = None
+    departure_address: _DictAddressBO = None
+    arrival_address: _DictAddressBO = None
+
+
+def _address(raw_trip, prefix):
+    """Build the address business object of a row"""
+    return _DictAddressBO(
+        id=raw_trip[prefix + "a_id"],
+        street_number=raw_trip[prefix + "a_street_number"],
+        street_name=raw_trip[prefix + "a_street_name"],
+        city=raw_trip[prefix + "a_city"],
+        postal_code=raw_trip[prefix + "a_postal_code"],
+        latitude=raw_trip[prefix + "a_latitude"],
+        longitude=raw_trip[prefix + "a_longitude"],
+    )
+
+
+def _legacy_format(rows):
+    """Formatting before the direct path: row -> business objects -> DTOs"""
+    trips = []
+    for raw_trip in rows:
+        trip_bo = _DictTripBO(
+            id=raw_trip["t_id"],
+            price=raw_trip["t_price"],
+            timestamp_proposed=raw_trip["t_timestamp_proposed"],
+            departure_address=_address(raw_trip, "departure_"),
+            arrival_address=_address(raw_trip, "arrival_"),
+            user_id=raw_trip["t_user_id"],
+            status=raw_trip.get("t_status", None),
+        )
+        address_dtos = {
+            "departure": AddressSimpleDTO(
+                id=trip_bo.departure_address.id, name=trip_bo.departure_address.get_full_address()
+            ),
+            "arrival": AddressSimpleDTO(id=trip_bo.arrival_address.id, name=trip_bo.arrival_address.get_full_address()),
+        }
+        trips.append(
+            TripDTO(
+                trip_id=trip_bo.id,
+                status=trip_bo.status,
+                address=address_dtos,
+                driver_id=trip_bo.user_id,
+                proposed_date=str(trip_bo.timestamp_proposed),
+                price=trip_bo.price,
+            )
+        )
+    return trips
+
+
+def _rows(count):
+    """Get trip rows like the ones of get_driver_trips"""
+    rows = []
+    for i in range(count):
+        row = {"t_id": i, "t_status": 1, "t_price": 4.5, "t_timestamp_proposed": datetime(2024, 1, 15), "t_user_id": 3}
+        for prefix in ("departure_", "arrival_"):
+            row.update(
+                {
+                    prefix + "a_id": i,
+                    prefix + "a_street_number": "140",
+                    prefix + "a_street_name": "Rue de la Nouvelle France",
+                    prefix + "a_city": "Montreuil",
+                    prefix + "a_postal_code": "93100",
+                    prefix + "a_latitude": 48.85,
+                    prefix + "a_longitude": 2.42,
+                }
+            )
+        rows.append(row)
+    return rows
+
+
+def _measure(format_rows, rows):
+    """Get the duration in milliseconds and the peak of allocated memory in KiB of a formatting"""
+    start = time.perf_counter()
+    format_rows(rows)
+    duration = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    format_rows(rows)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return duration, peak
+
+
+def _measure_addresses(address_class, rows):
+    """Get the memory in KiB of the address business objects of the rows, kept alive together"""
+    tracemalloc.start()
+    addresses = [address_class(id=row["departure_a_id"], city=row["departure_a_city"]) for row in rows]
+    size = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+    del addresses
+    return size
+
+
+def main(count=10000):
+    """Print the duration and the allocation peak of both formattings, and the size of the address objects"""
+    rows = _rows(count)
+    assert _legacy_format(rows) == format_get_current_driver_trips(rows)
+    for format_rows in (_legacy_format, format_get_current_driver_trips):
+        duration, peak = _measure(format_rows, rows)
+        print(f"{format_rows.__name__:<34}{duration:8.1f}ms {peak:10.0f}KiB")
+    for address_class in (_DictAddressBO, AddressBO):
+        print(f"{address_class.__name__:<34}{_measure_addresses(address_class, rows):20.0f}KiB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,24 @@
+"""Gunicorn configuration, the workers and threads are set with GUNICORN_WORKERS and GUNICORN_THREADS"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5050')}"
+
+# the application is loaded once, then the workers are forked from it
+preload_app = True
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+
+# same certificates as the development server, relative to the uniride_sme folder
+if os.getenv("CERTIFICATE_CRT_FOLDER") and os.getenv("CERTIFICATE_KEY_FOLDER"):
+    certfile = os.path.join("uniride_sme", os.getenv("CERTIFICATE_CRT_FOLDER"))
+    keyfile = os.path.join("uniride_sme", os.getenv("CERTIFICATE_KEY_FOLDER"))
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Initialize the pools and the caches of each worker"""
+    from uniride_sme.wsgi import init_worker  # pylint: disable=import-outside-toplevel
+
+    init_worker()
@@ -1,7 +1,9 @@
 """conftest.py"""
 from unittest.mock import MagicMock
 import pytest
-from uniride_sme import connect_pg, app
+from uniride_sme import connect_pg, app, cache
+from uniride_sme.rest_api import create_app
+from uniride_sme.utils import user_cache
 from uniride_sme.config import TestingConfig
 
 
@@ -12,7 +14,21 @@ def pytest_configure(config):
     file after command line options have been parsed.
     """
     # Setup testing config
-    app.config.from_object(TestingConfig)
+    create_app(TestingConfig())
+
+
+@pytest.fixture(scope="function", autouse=True)
+def app_context():
+    """Application context, the extensions are bound to the application through it"""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_cache(app_context):  # pylint: disable=unused-argument, redefined-outer-name
+    """Clear the caches, so the tests don't share cached values"""
+    cache.clear()
+    user_cache.clear()
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -1,3 +1,23 @@
+"""Test for admin service"""
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock
+import pytest
+
+from uniride_sme import app, cache
+from uniride_sme.rest_api import create_app
+from uniride_sme.service import admin_service
+from uniride_sme.service.admin_service import (
+    users_ranking,
+    users_information,
+    average_rating_user_id,
+    get_statistics,
+    users_statistics,
+    user_statistics,
+)
+from uniride_sme.utils.exception.exceptions import InvalidInputException
+from uniride_sme.utils.exception.user_exceptions import UserNotFoundException
+
 # import datetime
 # from unittest.mock import MagicMock, patch
 # import pytest
@@ -7,7 +27,6 @@
 #     delete_user,
 #     user_information_id,
 #     user_stat_passenger,
-#     user_stat_driver,
 # )
 # from uniride_sme.utils.exception.user_exceptions import UserNotFoundException
 
@@ -70,3 +89,144 @@
 #     mock_execute_command.assert_called_once_with(mock_conn.return_value, "DELETE FROM uniride.ur_user WHERE u_id = %s", (1,))
 #     # Verify that the connection was closed
 #     mock_conn.return_value.close.assert_called_once()
+
+
+@pytest.fixture(name="request_context")
+def fixture_request_context():
+    """Request context with the blueprints, to build the profile picture URLs"""
+    create_app()
+    with app.test_request_context():
+        yield
+
+
+def test_users_ranking(mock_get_query, request_context):  # pylint: disable=unused-argument
+    """Test the ranking is built from a single query"""
+    score_criteria = [{"id": 1, "name": "Punctuality", "value": "4.50"}, {"id": 2, "name": "Driving", "value": None}]
+    mock_get_query.return_value = [
+        (3, 1, "Doe", "John", "3_abc.png", Decimal("4.50"), 1, 12, score_criteria),
+        (5, 1, "Doe", "Jane", None, Decimal("4.00"), 2, 12, []),
+    ]
+
+    ranking, total_count = users_ranking(1, page=2, page_size=2)
+
+    mock_get_query.assert_called_once()
+    params = mock_get_query.call_args[0][2]
+    assert params == {"role": 1, "limit": 2, "offset": 2}
+    assert total_count == 12
+    assert [rank["rank"] for rank in ranking] == [1, 2]
+    assert ranking[0]["scoreCriteria"] == score_criteria
+    assert ranking[0]["user"]["profile_picture"].endswith("/user/pfp/3_abc.png")
+    assert ranking[1]["user"]["profile_picture"] == ""
+
+
+def test_users_ranking_empty(mock_get_query, request_context):  # pylint: disable=unused-argument
+    """Test the ranking of a role without rated users"""
+    mock_get_query.return_value = []
+    assert users_ranking(2) == ([], 0)
+
+
+def test_average_rating_user_id(mock_get_query):
+    """Test the average rating is read from the rating summary"""
+    mock_get_query.return_value = [(Decimal("3.67"),)]
+    assert average_rating_user_id(3) == Decimal("3.67")
+    assert "ur_rating_summary" in mock_get_query.call_args[0][1]
+
+
+def test_average_rating_user_id_not_rated(mock_get_query):
+    """Test the average rating of a user never rated"""
+    mock_get_query.return_value = []
+    assert average_rating_user_id(3) is None
+
+
+def test_get_statistics(mock_get_query):
+    """Test the dashboard statistics are computed with one query and cached"""
+    cache.delete_memoized(get_statistics)
+    mock_get_query.return_value = [(1, 20, 35, 4, 6, 2, 40, 1)]
+
+    statistics = get_statistics()
+    assert get_statistics() == statistics
+
+    mock_get_query.assert_called_once()
+    assert statistics["user_infos"] == {
+        "admin_count_value": 1,
+        "drivers_count_value": 20,
+        "passenger_count_value": 35,
+        "pending_count_value": 4,
+    }
+    assert statistics["trip_infos"] == {"trip_pending": 6, "trip_canceled": 2, "trip_completed": 40, "trip_oncourse": 1}
+    cache.delete_memoized(get_statistics)
+
+
+def test_users_statistics(mock_get_query):
+    """Test the statistics of several users are computed with one query"""
+    mock_get_query.return_value = [(3, 1, 0, 4, 0, 2, 1, Decimal("4.25")), (5, 0, 0, 0, 0, 0, 0, None)]
+
+    statistics = users_statistics([3, 5, 8])
+
+    mock_get_query.assert_called_once()
+    assert mock_get_query.call_args[0][2]["user_ids"] == [3, 5, 8]
+    assert statistics[3] == {
+        "driver_trip": {"pending_count": 1, "canceled_count": 0, "completed_count": 4, "oncourse_count": 0},
+        "passenger_trip": {"completed_count": 2, "pending_count": 1},
+        "average_rating": Decimal("4.25"),
+    }
+    assert statistics[5]["average_rating"] is None
+    assert 8 not in statistics
+
+
+def test_user_statistics_not_found(mock_get_query):
+    """Test the statistics of an unknown user"""
+    mock_get_query.return_value = []
+    with pytest.raises(UserNotFoundException):
+        user_statistics(8)
+
+
+def test_users_information_search(mock_get_query, request_context):  # pylint: disable=unused-argument
+    """Test the users are filtered, sorted and paginated in the query"""
+    mock_get_query.return_value = [(3, 2, "Doe", "John", "3_abc.png", None, None, 41)]
+
+    users, total_count = users_information(3, 20, sort="lastname", order="desc", role=2, search="Do_e")
+
+    query, params = mock_get_query.call_args[0][1:3]
+    assert "ORDER BY u_lastname desc" in query
+    assert params == {"limit": 20, "offset": 40, "role": 2, "search": "do\\_e%"}
+    assert total_count == 41
+    assert users[0]["profile_picture"].endswith("/user/pfp/3_abc.png")
+
+
+def test_users_information_past_last_page(mock_get_query):
+    """Test the users are still counted when the page is past the last one"""
+    mock_get_query.side_effect = [[], [(41,)]]
+
+    users, total_count = users_information(10, 20, role=2)
+
+    assert users == []
+    assert total_count == 41
+    count_query, params = mock_get_query.call_args[0][1:3]
+    assert count_query == "SELECT COUNT(*) FROM uniride.ur_user WHERE r_id = %(role)s"
+    assert params["role"] == 2
+
+
+def test_users_information_invalid_sort():
+    """Test sorting on a column that is not allowed"""
+    with pytest.raises(InvalidInputException):
+        users_information(sort="u_password")
+
+
+def test_bulk_export_dates(monkeypatch, mock_connect):  # pylint: disable=unused-argument
+    """Test the bulk export is filtered on the date column, the last day included"""
+    iter_copy = MagicMock(return_value=iter([b"t_id\n"]))
+    monkeypatch.setattr(admin_service.connect_pg, "iter_copy", iter_copy)
+
+    chunks = list(admin_service.bulk_export("trips", date(2024, 1, 1), date(2024, 6, 30)))
+
+    assert chunks == [b"t_id\n"]
+    query, params = iter_copy.call_args.args[1:]
+    assert "t_timestamp_proposed >= %(date_from)s AND t_timestamp_proposed < %(date_to)s::date + 1" in query
+    assert params == {"date_from": date(2024, 1, 1), "date_to": date(2024, 6, 30)}
+
+
+def test_bulk_export_invalid():
+    """Test an unknown export is refused before connecting"""
+    with pytest.raises(InvalidInputException):
+        admin_service.bulk_export("ur_user_password")
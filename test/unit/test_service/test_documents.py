@@ -0,0 +1,83 @@
+"""Test for documents service"""
+from datetime import datetime
+from unittest.mock import MagicMock
+import pytest
+
+from uniride_sme import app, cache
+from uniride_sme.model.bo.user_bo import UserBO
+from uniride_sme.rest_api import create_app
+from uniride_sme.service import documents_service, user_service
+from uniride_sme.service.documents_service import document_to_verify, document_number_status
+from uniride_sme.utils.exception.exceptions import InvalidInputException
+
+
+@pytest.fixture(name="request_context")
+def fixture_request_context():
+    """Request context with the blueprints, to build the profile picture URLs"""
+    create_app()
+    with app.test_request_context():
+        yield
+
+
+def test_document_to_verify(mock_get_query, request_context):  # pylint: disable=unused-argument
+    """Test the first page of the documents to verify"""
+    mock_get_query.return_value = [
+        (3, 10, "Doe", "John", "3_abc.png", datetime(2024, 1, 2, 10, 0, 0, 120), 2),
+        (5, 11, "Doe", "Jane", None, datetime(2024, 1, 3, 10, 0, 0), 1),
+    ]
+
+    requests, next_cursor = document_to_verify(limit=1)
+
+    params = mock_get_query.call_args[0][2]
+    assert params == {"after": None, "after_id": None, "limit": 2}
+    assert len(requests) == 1
+    assert requests[0]["documents_to_verify"] == 2
+    assert requests[0]["person"]["last_modified_date"] == "2024-01-02 10:00:00"
+    assert requests[0]["person"]["profile_picture"].endswith("/user/pfp/3_abc.png")
+    assert next_cursor == {"after": "2024-01-02T10:00:00.000120", "after_id": 3}
+
+
+def test_document_to_verify_last_page(mock_get_query, request_context):  # pylint: disable=unused-argument
+    """Test the last page of the documents to verify has no next cursor"""
+    mock_get_query.return_value = [(5, 11, "Doe", "Jane", None, datetime(2024, 1, 3, 10, 0, 0), 1)]
+
+    requests, next_cursor = document_to_verify("2024-01-02T10:00:00.000120", "3", 10)
+
+    params = mock_get_query.call_args[0][2]
+    assert params == {"after": datetime(2024, 1, 2, 10, 0, 0, 120), "after_id": 3, "limit": 11}
+    assert requests[0]["person"]["profile_picture"] == ""
+    assert next_cursor is None
+
+
+def test_document_to_verify_invalid_cursor():
+    """Test an invalid cursor is refused"""
+    with pytest.raises(InvalidInputException):
+        document_to_verify("yesterday", "3")
+
+
+def test_document_number_status(mock_get_query):
+    """Test the documents are counted by status with one cached query"""
+    cache.delete_memoized(document_number_status)
+    mock_get_query.return_value = [(12, 5, 2)]
+
+    assert document_number_status() == {"document_validated": 12, "document_pending": 5, "document_refused": 2}
+    document_number_status()
+
+    mock_get_query.assert_called_once()
+    cache.delete_memoized(document_number_status)
+
+
+def test_update_role_uncached(monkeypatch, mock_get_query, mock_execute_command):
+    """Test the role is computed from the user read from db and the tokens are made stale on every update"""
+    get_user_by_id = MagicMock(return_value=UserBO(id=3, email_verified=True, r_id=2))
+    monkeypatch.setattr(user_service, "get_user_by_id", get_user_by_id)
+    bump_token_version = MagicMock()
+    monkeypatch.setattr(documents_service, "bump_token_version", bump_token_version)
+    statuses = ("v_license_verified", "v_id_card_verified", "v_school_certificate_verified", "v_insurance_verified")
+    mock_get_query.return_value = [{status: 1 if status != "v_license_verified" else 0 for status in statuses}]
+
+    documents_service.update_role(3)
+
+    get_user_by_id.assert_called_once_with(3, use_cache=False)
+    assert "SET r_id = 2" in mock_execute_command.call_args[0][1]
+    bump_token_version.assert_called_once_with(3)
@@ -0,0 +1,58 @@
+"""Test for trip service"""
+from datetime import datetime
+
+from uniride_sme.model.bo.address_bo import AddressBO
+from uniride_sme.model.bo.trip_bo import TripBO
+from uniride_sme.service.trip_service import format_trip, format_get_current_driver_trips
+
+RAW_TRIP = {
+    "t_id": 7,
+    "t_status": 1,
+    "t_price": 4.5,
+    "t_timestamp_proposed": datetime(2024, 1, 15, 8, 30),
+    "t_user_id": 3,
+    "departure_a_id": 1,
+    "departure_a_street_number": "140",
+    "departure_a_street_name": "Rue de la Nouvelle France",
+    "departure_a_city": "Montreuil",
+    "departure_a_postal_code": "93100",
+    "departure_a_latitude": 48.85,
+    "departure_a_longitude": 2.42,
+    "arrival_a_id": 2,
+    "arrival_a_street_number": "1",
+    "arrival_a_street_name": "Rue de Rivoli",
+    "arrival_a_city": "Paris",
+    "arrival_a_postal_code": "75001",
+    "arrival_a_latitude": 48.86,
+    "arrival_a_longitude": 2.34,
+}
+
+
+def test_format_get_current_driver_trips():
+    """Test the DTOs built from the rows match the business objects"""
+    trip_bo = format_trip(RAW_TRIP)
+
+    trips = format_get_current_driver_trips([RAW_TRIP])
+
+    assert trips == [
+        {
+            "trip_id": 7,
+            "status": 1,
+            "address": {
+                "departure": {"id": 1, "name": trip_bo.departure_address.get_full_address()},
+                "arrival": {"id": 2, "name": trip_bo.arrival_address.get_full_address()},
+            },
+            "driver_id": 3,
+            "proposed_date": "2024-01-15 08:30:00",
+            "price": 4.5,
+        }
+    ]
+
+
+def test_business_objects_slotted():
+    """Test the business objects of the formatted rows have no instance dict"""
+    trip_bo = format_trip(RAW_TRIP)
+
+    assert not hasattr(trip_bo, "__dict__")
+    assert not hasattr(trip_bo.departure_address, "__dict__")
+    assert isinstance(trip_bo, TripBO) and isinstance(trip_bo.arrival_address, AddressBO)
@@ -1,10 +1,23 @@
 """test_user_service.py"""
 from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import MagicMock
+import bcrypt
 import pytest
+import psycopg2
+from werkzeug.datastructures import FileStorage
 
-from uniride_sme.service.user_service import authenticate, _validate_login, _validate_student_email
+from uniride_sme import app
+from uniride_sme.service import user_service, documents_service
+from uniride_sme.service.user_service import (
+    authenticate,
+    add_user,
+    _validate_login,
+    _validate_student_email,
+    _get_taken_message,
+)
 from uniride_sme.utils.exception.exceptions import MissingInputException, InvalidInputException
+from uniride_sme.utils.exception.user_exceptions import UserNotFoundException
 from uniride_sme.model.bo.user_bo import UserBO
 
 
@@ -21,10 +34,10 @@ def test_authenticate_missing_password():
 
 
 @pytest.fixture
-def mock_get_user_by_login(monkeypatch):
-    """Mock get_user_by_login"""
+def mock_get_user_by_login_or_email(monkeypatch):
+    """Mock get_user_by_login_or_email"""
     mock = MagicMock()
-    monkeypatch.setattr("uniride_sme.service.user_service.get_user_by_login", mock)
+    monkeypatch.setattr("uniride_sme.service.user_service.get_user_by_login_or_email", mock)
     return mock
 
 
@@ -37,9 +50,9 @@ def mock_verify_password(monkeypatch):
 
 
 @pytest.mark.parametrize("login, password", [("user1", "pass1"), ("user2", "pass2")])
-def test_authenticate_success(mock_get_user_by_login, mock_verify_password, login, password):
+def test_authenticate_success(mock_get_user_by_login_or_email, mock_verify_password, login, password):
     """Test authenticate is working correctly"""
-    mock_get_user_by_login.return_value = UserBO(
+    mock_get_user_by_login_or_email.return_value = UserBO(
         1,
         "user1",
         "u",
@@ -62,7 +75,7 @@ def test_authenticate_success(mock_get_user_by_login, mock_verify_password, logi
     user = authenticate(login, password)
 
     # Vérifiez que les mocks ont été appelés
-    mock_get_user_by_login.assert_called_once_with(login)
+    mock_get_user_by_login_or_email.assert_called_once_with(login, with_password=True)
     mock_verify_password.assert_called_once_with(password, user.password)
     assert user is not None
 
@@ -119,3 +132,147 @@ def test_validate_student_email_already_taken(mock_get_query):
     with pytest.raises(InvalidInputException) as excinfo:
         _validate_student_email(email)
     assert "EMAIL_TAKEN" in str(excinfo.value)
+
+
+@pytest.fixture(name="registration")
+def fixture_registration(monkeypatch, mock_connect, mock_get_query, mock_execute_command):
+    """Mock the database and the storage used by the registration"""
+    mock_get_query.return_value = [(False, False, False)]
+    mock_execute_command.return_value = 12
+    monkeypatch.setattr(user_service, "save_file", MagicMock(return_value="12_pfp.png"))
+    monkeypatch.setattr(documents_service, "save_file", MagicMock(return_value="12_license.pdf"))
+    monkeypatch.setattr(user_service, "get_user_by_id", MagicMock(return_value=UserBO(id=12)))
+    return mock_connect
+
+
+def _add_user(document_files=None):
+    """Register a valid user"""
+    return add_user(
+        "jdoe",
+        "Doe",
+        "John",
+        "john.doe@university.com",
+        "Password1!",
+        "Password1!",
+        "H",
+        "0612345678",
+        "",
+        FileStorage(filename="pfp.png"),
+        document_files,
+    )
+
+
+def test_add_user_single_transaction(registration, mock_get_query, mock_execute_command):
+    """Test the registration checks the uniqueness with one query and commits once"""
+    user_bo = _add_user({"license": FileStorage(filename="license.pdf")})
+
+    assert user_bo.id == 12
+    mock_get_query.assert_called_once()
+    assert mock_execute_command.call_count == 3
+    assert all(not call.kwargs["commit"] for call in mock_execute_command.call_args_list)
+    documents_query, documents_params = mock_execute_command.call_args_list[2].args[1:3]
+    assert "d_license" in documents_query and "v_license_verified" in documents_query
+    assert documents_params == (12, "12_license.pdf", 12)
+    registration.commit.assert_called_once()
+
+
+def test_add_user_taken(registration, mock_get_query, mock_execute_command):  # pylint: disable=unused-argument
+    """Test the first attribute already taken is reported"""
+    mock_get_query.return_value = [(False, True, True)]
+    with pytest.raises(InvalidInputException) as excinfo:
+        _add_user()
+    assert "EMAIL_TAKEN" in str(excinfo.value)
+    mock_execute_command.assert_not_called()
+
+
+def test_get_taken_message():
+    """Test the unique constraint violations are mapped to the existing messages"""
+    error = SimpleNamespace(diag=SimpleNamespace(message_detail="Key (u_phone_number)=(0612345678) already exists."))
+    assert _get_taken_message(error) == "PHONE_NUMBER_TAKEN"
+    error = SimpleNamespace(
+        diag=SimpleNamespace(message_detail="Key (lower(u_student_email))=(jdoe@university.com) already exists.")
+    )
+    assert _get_taken_message(error) == "EMAIL_TAKEN"
+
+
+def test_validate_student_email_taken_case_insensitive(mock_get_query):
+    """Test the student email is compared whatever its case"""
+    mock_get_query.return_value = [(False,)]
+    _validate_student_email("John.Doe@university.com")
+
+    query, params = mock_get_query.call_args.args[1:3]
+    assert "lower(u_student_email) = lower(%s)" in query
+    assert params == ("John.Doe@university.com",)
+
+
+def test_change_student_email_taken_concurrently(monkeypatch, mock_get_query, mock_execute_command, mock_disconnect):
+    """Test an email taken between the validation and the update is reported as taken"""
+    monkeypatch.setattr(user_service, "get_user_by_id", MagicMock(return_value=UserBO(id=1, student_email="a@b.fr")))
+    mock_get_query.return_value = [(False,)]
+    mock_execute_command.side_effect = psycopg2.errors.UniqueViolation()
+
+    with pytest.raises(InvalidInputException) as excinfo:
+        user_service.change_student_email(1, "John.Doe@university.com")
+
+    assert "EMAIL_TAKEN" in str(excinfo.value)
+    query, params = mock_get_query.call_args.args[1:3]
+    assert "AND u_id <> %s" in query
+    assert params == ("John.Doe@university.com", 1)
+    # the connection of the validation and the one of the update are closed
+    assert mock_disconnect.call_count == 2
+
+
+def test_authenticate_rehash_legacy_password(mock_get_user_by_login_or_email, mock_execute_command):
+    """Test a password hashed with the legacy shared salt is hashed again on login"""
+    legacy_hash = bcrypt.hashpw(b"Password1!", app.config["JWT_SALT"]).decode("utf8")
+    mock_get_user_by_login_or_email.return_value = UserBO(id=3, login="jdoe", password=legacy_hash)
+
+    authenticate("jdoe", "Password1!")
+
+    new_hash = mock_execute_command.call_args[0][2][0]
+    assert new_hash != legacy_hash
+    assert bcrypt.checkpw(b"Password1!", new_hash.encode("utf8"))
+
+
+def _user_row(**values):
+    """Get a row of ur_user"""
+    row = {
+        "u_id": 1,
+        "u_login": "jdoe",
+        "u_firstname": "John",
+        "u_lastname": "Doe",
+        "u_student_email": "john.doe@example.com",
+        "u_password": "hash",
+        "u_gender": "M",
+        "u_phone_number": "0123456789",
+        "u_description": None,
+        "u_profile_picture": None,
+        "u_timestamp_creation": None,
+        "u_timestamp_modification": None,
+        "u_email_verified": True,
+        "r_id": 1,
+    }
+    row.update(values)
+    return row
+
+
+def test_get_user_by_login_or_email_one_query(mock_connect, mock_get_query):
+    """Test the login and the email are looked up in a single query"""
+    mock_get_query.return_value = [_user_row()]
+
+    user = user_service.get_user_by_login_or_email("John.Doe@example.com", with_password=True)
+
+    assert user.id == 1
+    assert user.password == "hash"
+    mock_get_query.assert_called_once()
+    query, params = mock_get_query.call_args.args[1:3]
+    assert "u_login = %s OR lower(u_student_email) = lower(%s)" in query
+    assert params == ("John.Doe@example.com", "John.Doe@example.com")
+
+
+def test_get_user_by_login_or_email_not_found(mock_connect, mock_get_query):
+    """Test an unknown login or email"""
+    mock_get_query.return_value = []
+
+    with pytest.raises(UserNotFoundException):
+        user_service.get_user_by_login_or_email("unknown", with_password=True)
@@ -0,0 +1,38 @@
+"""Test for about routes"""
+import gzip
+import json
+import pytest
+
+from uniride_sme.rest_api import create_app
+
+
+@pytest.fixture(name="client")
+def fixture_client():
+    """Test client of the application"""
+    return create_app().test_client()
+
+
+def test_get_conditions(client):
+    """Test the conditions are returned with a strong ETag and a long cache"""
+    response = client.get("/about/conditions")
+    assert response.status_code == 200
+    assert "conditions" in response.get_json()
+    assert response.get_etag() == (response.get_etag()[0], False)
+    assert response.cache_control.max_age > 0
+
+
+def test_get_conditions_not_modified(client):
+    """Test a client with the current ETag gets a 304"""
+    etag = client.get("/about/conditions").get_etag()[0]
+    response = client.get("/about/conditions", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_get_privacy_gzip(client):
+    """Test the precompressed body is served to clients accepting gzip"""
+    plain = client.get("/about/privacy")
+    response = client.get("/about/privacy", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+    assert response.get_etag()[0] != plain.get_etag()[0]
@@ -0,0 +1,51 @@
+"""Test for the response compression"""
+import gzip
+from flask import jsonify
+import pytest
+
+from uniride_sme import app
+from uniride_sme.utils.compression import compress_response
+
+
+@pytest.fixture(name="large_json")
+def fixture_large_json():
+    """A JSON body larger than the compression threshold"""
+    return {"users": [{"id": i, "firstname": "firstname"} for i in range(app.config["COMPRESS_MIN_SIZE"])]}
+
+
+def test_compress_response_gzip(large_json):
+    """Test large responses are compressed with a weak ETag"""
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        body = jsonify(large_json).get_data()
+        response = compress_response(jsonify(large_json))
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert response.get_etag()[1] is True
+    assert gzip.decompress(response.get_data()) == body
+
+
+def test_compress_response_small():
+    """Test small responses are not compressed"""
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        response = compress_response(jsonify(message="OK"))
+    assert "Content-Encoding" not in response.headers
+    assert response.get_etag()[0]
+
+
+def test_compress_response_not_modified(large_json):
+    """Test a client with the current ETag gets a 304"""
+    with app.test_request_context():
+        etag = compress_response(jsonify(large_json)).headers["ETag"]
+    with app.test_request_context(headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}):
+        response = compress_response(jsonify(large_json))
+    assert response.status_code == 304
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compress_response_error():
+    """Test error responses are left untouched"""
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        response = jsonify(message="USER_NOT_FOUND")
+        response.status_code = 404
+        response = compress_response(response)
+    assert "ETag" not in response.headers
@@ -0,0 +1,77 @@
+"""Test for email utils"""
+from unittest.mock import MagicMock
+import pytest
+
+from uniride_sme import rq
+from uniride_sme.utils import email
+from uniride_sme.model.dto.user_dto import PassengerEmailsDTO
+
+
+@pytest.fixture
+def mock_queue(monkeypatch):
+    """Mock the redis queue"""
+    queue = MagicMock()
+    monkeypatch.setattr(rq, "get_queue", MagicMock(return_value=queue))
+    return queue
+
+
+def test_send_cancelation_emails_single_job(mock_queue):
+    """Test the cancelation emails of all the passengers are sent in one job"""
+    passengers = [
+        PassengerEmailsDTO(firstname="Alice", email="alice@university.com"),
+        PassengerEmailsDTO(firstname="Bob", email="bob@university.com"),
+    ]
+
+    email.send_cancelation_emails(passengers, 12)
+
+    mock_queue.enqueue_call.assert_called_once()
+    args, kwargs = mock_queue.enqueue_call.call_args
+    assert args[0] is email.send_bulk_email
+    messages = kwargs["args"][0]
+    assert [message[0] for message in messages] == ["alice@university.com", "bob@university.com"]
+    assert "Alice" in messages[0][2] and "Bob" in messages[1][2]
+    assert kwargs["on_failure"] is email.move_to_dead_letter_queue
+    assert kwargs["retry"].max == email.app.config["EMAIL_MAX_RETRIES"]
+
+
+def test_send_cancelation_emails_no_passenger(mock_queue):
+    """Test no job is queued when the trip has no passenger"""
+    email.send_cancelation_emails([], 12)
+    mock_queue.enqueue_call.assert_not_called()
+
+
+def test_move_to_dead_letter_queue(mock_queue):
+    """Test a failed job is only moved to the dead letter queue when it has no retries left"""
+    job = MagicMock(retries_left=1)
+    email.move_to_dead_letter_queue(job, None, ValueError, ValueError("error"), None)
+    mock_queue.enqueue_call.assert_not_called()
+
+    job.retries_left = 0
+    email.move_to_dead_letter_queue(job, None, ValueError, ValueError("error"), None)
+    mock_queue.enqueue_call.assert_called_once()
+
+
+def test_render_template_escapes_variables():
+    """Test the email templates are rendered with auto-escaping"""
+    content = email._render_template(  # pylint: disable=protected-access
+        "email_cancelation_template.html", firstname="<script>", url="https://uniride.fr/trips/1"
+    )
+    assert "<script>" not in content
+    assert "&lt;script&gt;" in content
+    assert "https://uniride.fr/trips/1" in content
+    assert "{{" not in content
+
+
+def test_send_bulk_email_retry_remaining(monkeypatch):
+    """Test a failed bulk email job is retried without the emails already sent"""
+    messages = [(f"user{i}@university.com", "Subject", "content") for i in range(3)]
+    conn = MagicMock()
+    conn.send.side_effect = [None, ConnectionError("SMTP")]
+    monkeypatch.setattr(email.mail, "connect", MagicMock(return_value=MagicMock(__enter__=lambda _: conn)))
+    job = MagicMock(args=(messages,))
+    monkeypatch.setattr(email, "get_current_job", lambda: job)
+
+    with pytest.raises(ConnectionError):
+        email.send_bulk_email(messages)
+
+    assert job.args == (messages[1:],)
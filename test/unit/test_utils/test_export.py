@@ -0,0 +1,126 @@
+"""Test for the streaming exports"""
+import itertools
+import json
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+import pytest
+from flask import request
+
+from uniride_sme import app, connect_pg
+from uniride_sme.utils import export
+from uniride_sme.utils.exception.exceptions import InvalidInputException
+
+ROWS = [
+    {"u_id": 1, "u_login": "jdoe", "average": Decimal("4.50"), "u_timestamp_creation": datetime(2024, 1, 15)},
+    {"u_id": 2, "u_login": "asmith", "average": None, "u_timestamp_creation": datetime(2024, 2, 1)},
+]
+
+
+def _body(export_format, rows):
+    """Get the body of an export response"""
+    with app.test_request_context():
+        response = export.export_response(iter(rows), export_format, "users")
+        return response.headers, response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 500])
+def test_export_json(monkeypatch, chunk_size):
+    """Test the rows are exported as a JSON array, whatever the chunks"""
+    monkeypatch.setattr(export, "CHUNK_SIZE", chunk_size)
+
+    headers, body = _body("json", ROWS)
+
+    assert json.loads(body) == json.loads(app.json.dumps(ROWS))
+    assert headers["Content-Disposition"] == 'attachment; filename="users.json"'
+
+
+def test_export_json_empty():
+    """Test an empty export is an empty JSON array"""
+    assert json.loads(_body("json", [])[1]) == []
+
+
+def test_export_ndjson():
+    """Test the rows are exported as a JSON object per line"""
+    lines = _body("ndjson", ROWS)[1].splitlines()
+
+    assert [json.loads(line)["u_login"] for line in lines] == ["jdoe", "asmith"]
+
+
+def test_export_csv():
+    """Test the rows are exported as CSV with a header"""
+    body = _body("csv", ROWS)[1]
+
+    assert body.splitlines() == [
+        "u_id,u_login,average,u_timestamp_creation",
+        "1,jdoe,4.50,2024-01-15 00:00:00",
+        "2,asmith,,2024-02-01 00:00:00",
+    ]
+
+
+def test_export_streamed():
+    """Test the first rows are sent before the last ones are fetched"""
+    rows = ({"u_id": i} for i in itertools.count())
+    with app.test_request_context():
+        response = export.export_response(rows, "ndjson", "users")
+        first_chunk = next(iter(response.response))
+
+    assert first_chunk.count("\n") == export.CHUNK_SIZE
+
+
+def test_get_export_format_invalid():
+    """Test an unknown format is refused"""
+    with app.test_request_context("/?format=xml"):
+        with pytest.raises(InvalidInputException):
+            export.get_export_format(request)
+
+
+def test_iter_query_server_side_cursor():
+    """Test the rows are fetched with a named cursor, closed at the end"""
+    conn = MagicMock()
+    cursor = conn.cursor.return_value
+    cursor.__iter__.return_value = iter([(1,), (2,)])
+
+    rows = list(connect_pg.iter_query(conn, "SELECT u_id FROM uniride.ur_user", itersize=100))
+
+    assert rows == [(1,), (2,)]
+    assert conn.cursor.call_args.kwargs["name"].startswith("iter_query_")
+    assert cursor.itersize == 100
+    cursor.close.assert_called_once()
+
+
+def _copy_connection(row_count):
+    """Connection whose COPY writes row_count CSV rows"""
+    conn = MagicMock()
+    conn.cursor.return_value.mogrify.side_effect = lambda query, params: query.encode()
+
+    def copy_expert(command, file):  # pylint: disable=unused-argument
+        file.write(b"u_id\n")
+        for i in range(row_count):
+            file.write(f"{i}\n".encode())
+
+    conn.cursor.return_value.copy_expert.side_effect = copy_expert
+    return conn
+
+
+def test_iter_copy():
+    """Test the CSV written by the COPY is yielded in buffered chunks"""
+    conn = _copy_connection(1000)
+
+    chunks = list(connect_pg.iter_copy(conn, "SELECT u_id FROM uniride.ur_user", buffer_size=1024))
+
+    assert b"".join(chunks).splitlines() == [b"u_id"] + [str(i).encode() for i in range(1000)]
+    assert len(chunks) > 1
+    command = conn.cursor.return_value.copy_expert.call_args.args[0]
+    assert command == "COPY (SELECT u_id FROM uniride.ur_user) TO STDOUT WITH (FORMAT csv, HEADER)"
+
+
+def test_iter_copy_reader_stops():
+    """Test the COPY is stopped when the reader stops before its end"""
+    conn = _copy_connection(100000)
+
+    chunks = connect_pg.iter_copy(conn, "SELECT u_id FROM uniride.ur_user", buffer_size=16, max_pending=1)
+    next(chunks)
+    chunks.close()
+
+    conn.cancel.assert_called_once()
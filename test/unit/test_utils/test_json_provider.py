@@ -0,0 +1,64 @@
+"""Test for the orjson JSON provider"""
+import dataclasses
+import json
+from datetime import datetime, date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from uniride_sme import app
+from uniride_sme.utils.json_provider import ORJSONProvider
+
+
+@dataclasses.dataclass(slots=True)
+class _Point:
+    """Slotted dataclass"""
+
+    latitude: float
+    longitude: float
+
+
+DATA = {
+    "trip_id": 7,
+    "proposed_date": datetime(2024, 1, 15, 8, 30),
+    "birthday": date(2000, 5, 4),
+    "average": Decimal("4.50"),
+    "address_name": "140 Rue de la Nouvelle France, Montreuil, 93100",
+    "stats": {3: {"driver_trip": 2}, 1: {"driver_trip": 0}},
+    "point": _Point(48.85, 2.42),
+    "passengers": [None, True, 1.5],
+}
+
+
+def test_same_json_as_default_provider():
+    """Test the serialized JSON is the same as the one of the default provider"""
+    expected = DefaultJSONProvider(app).dumps(DATA, separators=(",", ":"))
+
+    dumped = ORJSONProvider(app).dumps(DATA)
+
+    assert dumped == expected
+    assert json.loads(dumped)["proposed_date"] == "Mon, 15 Jan 2024 08:30:00 GMT"
+
+
+def test_response():
+    """Test the response body and mimetype"""
+    with app.app_context():
+        response = ORJSONProvider(app).response(DATA)
+
+    assert response.mimetype == "application/json"
+    assert response.data == DefaultJSONProvider(app).response(DATA).data
+
+
+def test_loads():
+    """Test the JSON is deserialized"""
+    assert ORJSONProvider(app).loads('{"login": "jdoe", "keepLoggedIn": true}') == {
+        "login": "jdoe",
+        "keepLoggedIn": True,
+    }
+
+
+def test_differences_with_default_provider():
+    """Test the documented differences with the default provider"""
+    dumped = ORJSONProvider(app).dumps({10: "a", 2: "b", "nan": float("nan")})
+
+    assert dumped == '{"10":"a","2":"b","nan":null}'
@@ -0,0 +1,102 @@
+"""Test for the token versions"""
+import time
+from unittest.mock import MagicMock
+import pytest
+
+from uniride_sme import app, cache
+from uniride_sme.model.bo.user_bo import UserBO
+from uniride_sme.service import user_service
+from uniride_sme.utils import jwt_token, user_cache
+
+
+@pytest.fixture(name="token")
+def fixture_token(monkeypatch):
+    """Token of a passenger created a minute ago"""
+    claims = {"sub": {"id": 3, "role": 2}, "ver": time.time() - 60}
+    monkeypatch.setattr(jwt_token, "get_jwt", lambda: claims)
+    monkeypatch.setattr(jwt_token, "get_jwt_identity", lambda: claims["sub"])
+    return claims
+
+
+@pytest.fixture(name="mock_get_user_by_id")
+def fixture_mock_get_user_by_id(monkeypatch):
+    """Mock get_user_by_id, the user became a driver"""
+    mock = MagicMock(return_value=UserBO(id=3, r_id=1))
+    monkeypatch.setattr(user_service, "get_user_by_id", mock)
+    return mock
+
+
+def test_fresh_identity_unchanged(token, mock_get_user_by_id):  # pylint: disable=unused-argument
+    """Test the identity of the token is used without reading the user"""
+    with app.test_request_context():
+        assert jwt_token.get_fresh_identity() == {"id": 3, "role": 2}
+    mock_get_user_by_id.assert_not_called()
+
+
+def test_fresh_identity_stale(token, mock_get_user_by_id):  # pylint: disable=unused-argument
+    """Test the identity is reloaded after the role of the user changed"""
+    jwt_token.bump_token_version(3)
+    with app.test_request_context():
+        assert jwt_token.get_fresh_identity(set_cookie=False) == {"id": 3, "role": 1}
+        assert jwt_token.get_fresh_identity(set_cookie=False) == {"id": 3, "role": 1}
+    mock_get_user_by_id.assert_called_once_with(3, use_cache=False)
+
+
+def test_fresh_identity_stale_local_cache(token, mock_get_query):  # pylint: disable=unused-argument
+    """Test the identity is reloaded from the database, the local tier of the cache may hold the old role"""
+    user_cache.set_user(UserBO(id=3, login="jdoe", student_email="john.doe@university.com", r_id=2))
+    cache.delete("user:id:3")
+    jwt_token.bump_token_version(3)
+    row = {column: None for column in ("u_login", "u_firstname", "u_lastname", "u_student_email", "u_password")}
+    row.update(u_id=3, r_id=1, u_gender="H", u_phone_number="", u_description="", u_profile_picture=None)
+    row.update(u_timestamp_creation=None, u_timestamp_modification=None, u_email_verified=True)
+    mock_get_query.return_value = [row]
+
+    with app.test_request_context():
+        assert jwt_token.get_fresh_identity(set_cookie=False) == {"id": 3, "role": 1}
+    mock_get_query.assert_called_once()
+
+
+def test_fresh_identity_new_token(token, mock_get_user_by_id):
+    """Test a token created after the change is not stale"""
+    jwt_token.bump_token_version(3)
+    token["ver"] = time.time() + 1
+    with app.test_request_context():
+        assert jwt_token.get_fresh_identity()["role"] == 2
+    mock_get_user_by_id.assert_not_called()
+
+
+def test_error_response_message():
+    """Test the jwt errors are formatted like the other messages"""
+    with app.test_request_context():
+        response, status_code = jwt_token.expired_token_response({}, {})
+        assert response.get_json() == {"message": "TOKEN_HAS_EXPIRED"}
+        assert status_code == 401
+
+        response, status_code = jwt_token.invalid_token_response("Signature verification failed")
+        assert response.get_json() == {"message": "TOKEN_SIGNATURE_VERIFICATION_FAILED"}
+        assert status_code == 422
+
+
+def test_refresh_outside_window(token):
+    """Test the access token isn't refreshed when it doesn't expire soon"""
+    token.update(type="access", exp=time.time() + 3600)
+    with app.test_request_context():
+        response = jwt_token.refresh_expiring_jwts(app.response_class())
+    assert not response.headers.getlist("Set-Cookie")
+
+
+def test_refresh_within_window(token):
+    """Test the access token is refreshed when it expires soon"""
+    token.update(type="access", exp=time.time() + 10)
+    with app.test_request_context():
+        response = jwt_token.refresh_expiring_jwts(app.response_class())
+    assert response.headers.getlist("Set-Cookie")[0].startswith(app.config["JWT_ACCESS_COOKIE_NAME"] + "=")
+
+
+def test_refresh_error_response(token):
+    """Test the access token isn't refreshed on error responses"""
+    token.update(type="access", exp=time.time() + 10)
+    with app.test_request_context():
+        response = jwt_token.refresh_expiring_jwts(app.response_class(status=422))
+    assert not response.headers.getlist("Set-Cookie")
@@ -0,0 +1,60 @@
+"""Test for the password hashing"""
+import threading
+import bcrypt
+import pytest
+
+from uniride_sme import app
+from uniride_sme.utils import password
+from uniride_sme.utils.exception.exceptions import ServiceUnavailableException
+
+
+def test_hash_password_own_salt():
+    """Test each hash has its own salt and the configured cost"""
+    first_hash = password.hash_password("Password1!")
+    second_hash = password.hash_password("Password1!")
+
+    assert first_hash != second_hash
+    assert first_hash.startswith(f"$2b${app.config['BCRYPT_ROUNDS']:02d}$")
+    assert password.check_password("Password1!", first_hash)
+    assert not password.check_password("Password2!", first_hash)
+
+
+def test_needs_rehash():
+    """Test the legacy shared salt and the outdated costs are rehashed"""
+    legacy_hash = bcrypt.hashpw(b"Password1!", app.config["JWT_SALT"]).decode("utf8")
+    outdated_hash = bcrypt.hashpw(b"Password1!", bcrypt.gensalt(app.config["BCRYPT_ROUNDS"] + 1)).decode("utf8")
+
+    assert password.needs_rehash(legacy_hash)
+    assert password.needs_rehash(outdated_hash)
+    assert not password.needs_rehash(password.hash_password("Password1!"))
+
+
+def test_check_password_busy(monkeypatch):
+    """Test the checks are refused when too many are pending"""
+    hashed_password = password.hash_password("Password1!")
+    password.reset_pool()
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_MAX_PENDING", 1)
+    _, slots = password._get_pool()  # pylint: disable=protected-access
+    slots.acquire()
+    try:
+        with pytest.raises(ServiceUnavailableException):
+            password.check_password("Password1!", hashed_password)
+    finally:
+        slots.release()
+        password.reset_pool()
+
+
+def test_check_password_in_pool(monkeypatch):
+    """Test bcrypt runs in the threads of the pool"""
+    thread_names = []
+    checkpw = bcrypt.checkpw
+
+    def recording_checkpw(*args):
+        thread_names.append(threading.current_thread().name)
+        return checkpw(*args)
+
+    hashed_password = password.hash_password("Password1!")
+    monkeypatch.setattr(password.bcrypt, "checkpw", recording_checkpw)
+
+    assert password.check_password("Password1!", hashed_password)
+    assert thread_names[0].startswith("password")
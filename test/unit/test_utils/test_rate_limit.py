@@ -0,0 +1,156 @@
+"""Tests of the authentication rate limit"""
+from unittest.mock import MagicMock
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from uniride_sme import app
+from uniride_sme.utils import rate_limit
+from uniride_sme.utils.exception.exceptions import InvalidInputException, TooManyRequestsException
+
+
+class FakeRedis:
+    """In memory redis, with the commands used by the rate limit"""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def pipeline(self):
+        """Get a pipeline executing the commands on this redis"""
+        return FakePipeline(self)
+
+    def incr(self, key):
+        """Increment a counter"""
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def expire(self, key, seconds):
+        """Set the time to live of a key"""
+        self.ttls[key] = seconds
+
+    def get(self, key):
+        """Get a value"""
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        """Set a value"""
+        self.values[key] = value
+        self.ttls[key] = ex
+
+    def delete(self, key):
+        """Delete a key"""
+        self.values.pop(key, None)
+
+    def ttl(self, key):
+        """Get the time to live of a key, -2 if it doesn't exist"""
+        return self.ttls.get(key, -1) if key in self.values else -2
+
+
+class FakePipeline:
+    """Pipeline of FakeRedis"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        """Execute the commands"""
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+@pytest.fixture(name="redis")
+def fixture_redis(monkeypatch):
+    """Use an in memory redis"""
+    redis = FakeRedis()
+    monkeypatch.setattr(rate_limit, "_get_redis", lambda: redis)
+    return redis
+
+
+def _check(ip_address, login):
+    """Check the rate limit in a request, returns the headers of the response"""
+    with app.test_request_context():
+        response = app.response_class()
+        try:
+            rate_limit.check_login(ip_address, login)
+        finally:
+            response = app.process_response(response)
+    return response.headers
+
+
+def test_check_login_remaining_headers(redis):  # pylint: disable=unused-argument
+    """Test the remaining attempts are the ones of the most limited key"""
+    headers = _check("127.0.0.1", "jdoe")
+
+    assert headers["X-RateLimit-Limit"] == str(app.config["LOGIN_RATE_LIMIT_LOGIN"])
+    assert headers["X-RateLimit-Remaining"] == str(app.config["LOGIN_RATE_LIMIT_LOGIN"] - 1)
+
+
+def test_check_login_over_limit(redis):  # pylint: disable=unused-argument
+    """Test the attempts over the limit of a login are rejected"""
+    for _ in range(app.config["LOGIN_RATE_LIMIT_LOGIN"]):
+        _check("127.0.0.1", "jdoe")
+
+    with pytest.raises(TooManyRequestsException) as e:
+        _check("127.0.0.1", "JDoe")
+    assert e.value.status_code == 429
+    assert e.value.message == "TOO_MANY_REQUESTS"
+
+
+def test_lockout_after_failures(redis):
+    """Test a login is locked out after too many failures, and the failures are reset by a success"""
+    for _ in range(app.config["LOGIN_LOCKOUT_THRESHOLD"] - 1):
+        rate_limit.record_failure("jdoe")
+    rate_limit.record_success("jdoe")
+    rate_limit.record_failure("jdoe")
+    assert redis.ttl(rate_limit._lockout_key("jdoe")) == -2  # pylint: disable=protected-access
+
+    for _ in range(app.config["LOGIN_LOCKOUT_THRESHOLD"]):
+        rate_limit.record_failure("jdoe")
+
+    with pytest.raises(TooManyRequestsException) as e:
+        _check("127.0.0.1", "jdoe")
+    assert e.value.message == "ACCOUNT_LOCKED"
+
+
+def test_check_login_redis_unavailable(monkeypatch):
+    """Test the authentication stays available when redis isn't"""
+    redis = MagicMock()
+    redis.ttl.side_effect = RedisConnectionError()
+    monkeypatch.setattr(rate_limit, "_get_redis", lambda: redis)
+
+    headers = _check("127.0.0.1", "jdoe")
+
+    assert "X-RateLimit-Limit" not in headers
+
+
+def test_client_ip_not_forwarded_by_default(monkeypatch):
+    """Test the X-Forwarded-For header set by the client is ignored when no reverse proxy is configured"""
+    ips = []
+
+    def check_login(ip, login):  # pylint: disable=unused-argument
+        ips.append(ip)
+        raise TooManyRequestsException("TOO_MANY_REQUESTS")
+
+    monkeypatch.setattr(rate_limit, "check_login", check_login)
+
+    response = app.test_client().post(
+        "/user/auth",
+        json={"login": "jdoe", "password": "password"},
+        headers={"X-Forwarded-For": "203.0.113.7"},
+        environ_base={"REMOTE_ADDR": "10.0.0.2"},
+    )
+
+    assert response.status_code == 429
+    assert ips == ["10.0.0.2"]
+
+
+@pytest.mark.parametrize("login", [42, ["jdoe"], {"login": "jdoe"}])
+def test_check_login_not_a_string(redis, login):
+    """Test a login that isn't a string is rejected before being counted"""
+    with app.test_request_context():
+        with pytest.raises(InvalidInputException):
+            rate_limit.check_login("10.0.0.1", login)
+    assert not redis.values
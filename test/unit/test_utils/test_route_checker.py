@@ -0,0 +1,33 @@
+"""Test for the route checker factory"""
+import pytest
+
+from uniride_sme import app
+from uniride_sme.utils.cartography.open_street_map_route_checker import OpenStreetMapRouteChecker
+from uniride_sme.utils.cartography.route_checker_factory import get_route_checker
+from uniride_sme.utils.exception.exceptions import MissingInputException
+
+
+@pytest.fixture(name="route_checker_choice")
+def fixture_route_checker_choice(monkeypatch):
+    """Forget the route checker before and after the test"""
+    get_route_checker.cache_clear()
+    yield lambda choice: monkeypatch.setitem(app.config, "ROUTE_CHECKER", choice)
+    get_route_checker.cache_clear()
+
+
+def test_get_route_checker_singleton(route_checker_choice):
+    """Test the route checker is created once, on first use"""
+    route_checker_choice("osm")
+
+    route_checker = get_route_checker()
+
+    assert isinstance(route_checker, OpenStreetMapRouteChecker)
+    assert get_route_checker() is route_checker
+
+
+def test_get_route_checker_invalid_choice(route_checker_choice):
+    """Test an invalid choice is reported on first use"""
+    route_checker_choice("unknown")
+
+    with pytest.raises(MissingInputException):
+        get_route_checker()
@@ -0,0 +1,172 @@
+"""Test for the storage backends"""
+import io
+import pytest
+from flask_jwt_extended import create_access_token
+from werkzeug.datastructures import FileStorage
+
+from uniride_sme import app
+from uniride_sme.utils import file as file_utils
+from uniride_sme.utils.file import save_file, read_file, delete_file, get_file_etag, get_content_hash
+from uniride_sme.utils.storage.local_storage import LocalStorage
+from uniride_sme.utils.storage.s3_storage import S3Storage
+from uniride_sme.utils.exception.exceptions import FileException
+
+
+class FakeClientError(Exception):
+    """Stand-in for botocore ClientError"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3Client:
+    """In memory stand-in for an S3 client"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType):  # pylint: disable=invalid-name, unused-argument
+        """Put object"""
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):  # pylint: disable=invalid-name
+        """Get object"""
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError("NoSuchKey")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def head_object(self, Bucket, Key):  # pylint: disable=invalid-name
+        """Head object"""
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError("404")
+
+    def delete_object(self, Bucket, Key):  # pylint: disable=invalid-name
+        """Delete object"""
+        self.objects.pop((Bucket, Key), None)
+
+
+@pytest.fixture
+def local_storage(monkeypatch, tmp_path):
+    """Use a local storage writing in a temporary folder"""
+    monkeypatch.setitem(app.config, "PFP_UPLOAD_FOLDER", str(tmp_path))
+    storage = LocalStorage()
+    monkeypatch.setattr(file_utils, "get_storage", lambda: storage)
+    return storage
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    """Use a s3 storage with an in memory client"""
+    monkeypatch.setattr("uniride_sme.utils.storage.s3_storage.ClientError", FakeClientError)
+    monkeypatch.setitem(app.config, "S3_BUCKET", "uniride")
+    storage = S3Storage(client=FakeS3Client())
+    monkeypatch.setattr(file_utils, "get_storage", lambda: storage)
+    return storage
+
+
+@pytest.mark.parametrize("storage_fixture", ["local_storage", "s3_storage"])
+def test_save_file_content_addressed(request, storage_fixture):
+    """Test save_file names the file with the hash of its content"""
+    storage = request.getfixturevalue(storage_fixture)
+    content = b"picture"
+    file = FileStorage(stream=io.BytesIO(content), filename="me.PNG")
+
+    file_name = save_file(file, "PFP_UPLOAD_FOLDER", ["png"], 1)
+
+    assert file_name == f"1_{get_content_hash(content)}.png"
+    assert get_file_etag(file_name) == get_content_hash(content)
+    assert storage.exists(file_name, "PFP_UPLOAD_FOLDER")
+    assert read_file(file_name, "PFP_UPLOAD_FOLDER") == content
+
+
+@pytest.mark.parametrize("storage_fixture", ["local_storage", "s3_storage"])
+def test_delete_file(request, storage_fixture):
+    """Test delete_file removes the file and raises when the file doesn't exist"""
+    storage = request.getfixturevalue(storage_fixture)
+    storage.save(b"data", "1_abc.png", "PFP_UPLOAD_FOLDER")
+
+    delete_file("1_abc.png", "PFP_UPLOAD_FOLDER")
+
+    assert not storage.exists("1_abc.png", "PFP_UPLOAD_FOLDER")
+    with pytest.raises(FileNotFoundError):
+        delete_file("1_abc.png", "PFP_UPLOAD_FOLDER")
+
+
+def test_read_file_not_found(local_storage):  # pylint: disable=unused-argument
+    """Test read_file when the file doesn't exist"""
+    with pytest.raises(FileException) as e:
+        read_file("unknown.png", "PFP_UPLOAD_FOLDER")
+    assert e.value.status_code == 404
+
+
+def test_local_storage_refuses_path_traversal(local_storage):
+    """Test the local storage doesn't read outside of the upload folder"""
+    with pytest.raises(FileNotFoundError):
+        local_storage.read("../secret.png", "PFP_UPLOAD_FOLDER")
+
+
+def test_save_file_invalid_extension(local_storage):  # pylint: disable=unused-argument
+    """Test save_file when the extension isn't allowed"""
+    file = FileStorage(stream=io.BytesIO(b"data"), filename="script")
+    with pytest.raises(FileException):
+        save_file(file, "PFP_UPLOAD_FOLDER", ["png"], 1)
+
+
+def test_get_file_etag_legacy_name():
+    """Test the legacy file names, without content hash, have no ETag"""
+    assert get_file_etag("3.png") is None
+    assert get_file_etag("3_abc.png") is None
+
+
+@pytest.fixture(name="client")
+def fixture_client(monkeypatch, local_storage):  # pylint: disable=unused-argument
+    """Client authenticated as a passenger"""
+    # the identities are dicts, the recent versions of PyJWT only accept string subjects
+    monkeypatch.setitem(app.config, "JWT_VERIFY_SUB", False)
+    client = app.test_client()
+    with app.app_context():
+        client.set_cookie("access_token_cookie", create_access_token(identity={"id": 3, "role": 2}))
+    return client
+
+
+def test_get_profile_picture_requires_authentication(local_storage):
+    """Test the profile pictures aren't public"""
+    file_name = save_file(
+        FileStorage(stream=io.BytesIO(b"picture"), filename="me.png"), "PFP_UPLOAD_FOLDER", ["png"], 1
+    )
+
+    assert app.test_client().get(f"/user/pfp/{file_name}").status_code == 401
+
+
+def test_get_profile_picture_immutable(client):
+    """Test a content addressed profile picture is cached forever"""
+    file_name = save_file(
+        FileStorage(stream=io.BytesIO(b"picture"), filename="me.png"), "PFP_UPLOAD_FOLDER", ["png"], 1
+    )
+
+    response = client.get(f"/user/pfp/{file_name}")
+
+    assert response.data == b"picture"
+    assert response.get_etag()[0] == get_content_hash(b"picture")
+    assert response.cache_control.immutable
+    revalidated = client.get(f"/user/pfp/{file_name}", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    delete_file(file_name, "PFP_UPLOAD_FOLDER")
+    deleted = client.get(f"/user/pfp/{file_name}", headers={"If-None-Match": response.headers["ETag"]})
+    assert deleted.status_code == 404
+
+
+def test_get_profile_picture_legacy(client, local_storage):
+    """Test a legacy profile picture is revalidated with the hash of its content"""
+    local_storage.save(b"old picture", "3.png", "PFP_UPLOAD_FOLDER")
+
+    response = client.get("/user/pfp/3.png")
+
+    assert response.get_etag()[0] == get_content_hash(b"old picture")
+    assert not response.cache_control.immutable
+    assert response.cache_control.no_cache
+    local_storage.save(b"new picture", "3.png", "PFP_UPLOAD_FOLDER")
+    changed = client.get("/user/pfp/3.png", headers={"If-None-Match": response.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.data == b"new picture"
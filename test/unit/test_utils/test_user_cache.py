@@ -0,0 +1,73 @@
+"""Test for the user cache"""
+from datetime import datetime
+import pytest
+
+from uniride_sme import cache
+from uniride_sme.model.bo.user_bo import UserBO
+from uniride_sme.service.user_service import get_user_by_id, get_user_by_login, change_firstname
+from uniride_sme.utils import user_cache
+
+
+@pytest.fixture(name="user_row")
+def fixture_user_row():
+    """Row of a user in the database"""
+    return {
+        "u_id": 3,
+        "u_login": "jdoe",
+        "u_firstname": "John",
+        "u_lastname": "Doe",
+        "u_student_email": "john.doe@university.com",
+        "u_password": "$2b$12$hash",
+        "u_gender": "H",
+        "u_phone_number": "0612345678",
+        "u_description": "",
+        "u_profile_picture": None,
+        "u_timestamp_creation": datetime(2024, 1, 2),
+        "u_timestamp_modification": datetime(2024, 1, 2),
+        "u_email_verified": True,
+        "r_id": 2,
+    }
+
+
+def test_get_user_cached(mock_get_query, user_row):
+    """Test the user is read once from the database, then by id or login from the cache, always without password"""
+    mock_get_query.return_value = [user_row]
+
+    from_db = get_user_by_id(3)
+    user_bo = get_user_by_id(3)
+    assert from_db == user_bo
+    assert get_user_by_login("jdoe") == user_bo
+
+    mock_get_query.assert_called_once()
+    assert user_bo.firstname == "John"
+    assert user_bo.password is None
+
+
+def test_password_never_cached(mock_get_query, user_row):
+    """Test the password is not stored in redis and the users needing it are read from the database"""
+    mock_get_query.return_value = [user_row]
+
+    get_user_by_id(3)
+    assert cache.get("user:id:3")["password"] is None
+
+    assert get_user_by_login("jdoe", with_password=True).password == "$2b$12$hash"
+    assert mock_get_query.call_count == 2
+
+
+def test_login_changed(user_row):
+    """Test a login key pointing to a user whose login changed is a miss"""
+    user_cache.set_user(UserBO(id=3, login="jdoe", student_email=user_row["u_student_email"]))
+    user_cache.set_user(UserBO(id=3, login="johndoe", student_email=user_row["u_student_email"]))
+
+    assert user_cache.get_user("jdoe", "u_login") is None
+    assert user_cache.get_user("johndoe", "u_login").id == 3
+
+
+def test_invalidate_on_change(mock_get_query, mock_execute_command, user_row):  # pylint: disable=unused-argument
+    """Test the user is read again from the database after a change"""
+    mock_get_query.return_value = [user_row]
+    get_user_by_id(3)
+
+    change_firstname(3, "Jack")
+
+    assert user_cache.get_user(3, "u_id") is None
@@ -6,13 +6,12 @@ from flask_mail import Mail
 from flask_jwt_extended import JWTManager
 from flask_rq2 import RQ
 from flask_caching import Cache
-from uniride_sme.config import Config
 
+# the application is configured and the extensions are initialized by rest_api.create_app
 app = Flask(__name__)
-app.config.from_object(Config)
-cors = CORS(app, resources={r"*": {"origins": "https://localhost:4200"}}, supports_credentials=True)
-api = Api(app)
-mail = Mail(app)
-jwt = JWTManager(app)
-rq = RQ(app)
-cache = Cache(app)
+cors = CORS(resources={r"*": {"origins": "https://localhost:4200"}}, supports_credentials=True)
+api = Api()
+mail = Mail()
+jwt = JWTManager()
+rq = RQ()
+cache = Cache()
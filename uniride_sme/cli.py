@@ -0,0 +1,55 @@
+"""Commands of the application:
+$ flask --app "uniride_sme.rest_api:create_app()" export trips --from 2024-01-01 --to 2024-06-30 -o trips.csv
+"""
+import os
+import tempfile
+import click
+from flask.cli import with_appcontext
+from uniride_sme.service import admin_service
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pragma: no cover
+    pa_csv = None
+    pa_parquet = None
+
+
+def _write_parquet(chunks, output):
+    """Write the CSV chunks to a parquet file, through a temporary CSV file read by batches"""
+    if pa_csv is None:
+        raise click.ClickException("the parquet format requires pyarrow: pip install -e .[parquet]")
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "export.csv")
+        with open(csv_path, "wb") as csv_file:
+            for chunk in chunks:
+                csv_file.write(chunk)
+
+        reader = pa_csv.open_csv(csv_path)
+        with pa_parquet.ParquetWriter(output, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+
+
+@click.command("export")
+@click.argument("name", type=click.Choice(sorted(admin_service.BULK_EXPORTS)))
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]), help="First day, included.")
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]), help="Last day, included.")
+@click.option("--format", "export_format", type=click.Choice(["csv", "parquet"]), default="csv")
+@click.option("-o", "--output", default="-", help="Output file, the standard output by default for csv.")
+@with_appcontext
+def export_command(name, date_from, date_to, export_format, output):
+    """Export the trips, bookings, ratings or users with COPY"""
+    chunks = admin_service.bulk_export(
+        name, date_from.date() if date_from else None, date_to.date() if date_to else None
+    )
+    if export_format == "parquet":
+        if output == "-":
+            raise click.UsageError("the parquet format requires an --output file")
+        _write_parquet(chunks, output)
+        return
+
+    with click.open_file(output, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk)
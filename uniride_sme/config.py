@@ -1,106 +1,158 @@
 """Configure database connection"""
 # !/usr/bin/python
 from configparser import ConfigParser, NoSectionError
-import dataclasses
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
 
 
-@dataclasses.dataclass
-class Config:
-    """Config variables"""
-
-    PATH = os.path.dirname(__file__)
-    load_dotenv()
-
-    SECRET_KEY = os.getenv("SECRET_KEY")
-    SECURITY_PASSWORD_SALT = os.getenv("SECURITY_PASSWORD_SALT")
-
-    # Mail config
-    MAIL_SERVER = os.getenv("MAIL_SERVER")
-    MAIL_PORT = 465
-    MAIL_USE_TLS = False
-    MAIL_USE_SSL = True
-    MAIL_DEBUG = False
-    MAIL_USERNAME = os.getenv("MAIL_USERNAME")
-    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
-
-    MAIL_EXPIRATION = int(os.getenv("MAIL_EXPIRATION"))
-
-    UNIVERSITY_EMAIL_DOMAIN = os.getenv("UNIVERSITY_EMAIL_DOMAIN")
-
-    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH"))
-    PFP_UPLOAD_FOLDER = os.getenv("PFP_UPLOAD_FOLDER")
-    LICENSE_UPLOAD_FOLDER = os.getenv("LICENSE_UPLOAD_FOLDER")
-    ID_CARD_UPLOAD_FOLDER = os.getenv("ID_CARD_UPLOAD_FOLDER")
-    SCHOOL_CERTIFICATE_UPLOAD_FOLDER = os.getenv("SCHOOL_CERTIFICATE_UPLOAD_FOLDER")
-    INSURANCE_UPLOAD_FOLDER = os.getenv("INSURANCE_UPLOAD_FOLDER")
-
-    # JWT config
-    JWT_SALT = os.getenv("JWT_SALT").encode("utf8")
-    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-    JWT_TOKEN_LOCATION = ["cookies"]
-    JWT_COOKIE_SECURE = True
-    JWT_COOKIE_CSRF_PROTECT = False
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES")))
-    JWT_ACCESS_TOKEN_REFRESH = timedelta(seconds=int(os.getenv("JWT_ACCESS_TOKEN_REFRESH")))
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES")))
-    JWT_COOKIE_SAMESITE = "None"
-    # RQ config
-    CACHE_TYPE = os.getenv("CACHE_TYPE")
-    RQ_REDIS_URL = os.getenv("RQ_REDIS_URL")
-
-    # Cache config
-    CACHE_REDIS_HOST = os.getenv("CACHE_REDIS_HOST")
-    CACHE_REDIS_PORT = os.getenv("CACHE_REDIS_PORT")
-    CACHE_REDIS_PASSWORD = os.getenv("CACHE_REDIS_PASSWORD")
-    CACHE_REDIS_DB = os.getenv("CACHE_REDIS_DB")
-
-    FRONT_END_URL = os.getenv("FRONT_END_URL")
-
-    # DB config
-    DB_HOST = os.getenv("DB_HOST")
-    DB_NAME = os.getenv("DB_NAME")
-    DB_USER = os.getenv("DB_USER")
-    DB_PWD = os.getenv("DB_PWD")
-    DB_PORT = os.getenv("DB_PORT", "5432")
-
-    TESTING = False
-    DEBUG = False
-
-    # University address
-    UNIVERSITY_STREET_NUMBER = str(os.getenv("UNIVERSITY_STREET_NUMBER"))
-    UNIVERSITY_STREET_NAME = str(os.getenv("UNIVERSITY_STREET_NAME"))
-    UNIVERSITY_CITY = str(os.getenv("UNIVERSITY_CITY"))
-    UNIVERSITY_POSTAL_CODE = str(os.getenv("UNIVERSITY_POSTAL_CODE"))
-
-    # Api key for google maps
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-    ROUTE_CHECKER = os.getenv("ROUTE_CHECKER")
-
-    RATE_PER_KM = float(os.getenv("RATE_PER_KM"))
-    COST_PER_KM = float(os.getenv("COST_PER_KM"))
-    BASE_RATE = float(os.getenv("BASE_RATE"))
-
-    ACCEPT_TIME_DIFFERENCE_MINUTES = int(os.getenv("ACCEPT_TIME_DIFFERENCE_MINUTES"))
-
-    # FLask configuration
-    FLASK_DEBUG = os.getenv("FLASK_DEBUG")
-    FLASK_HOST = os.getenv("FLASK_HOST")
-    FLASK_PORT = os.getenv("FLASK_PORT")
-
-    # CERTS
-    CERTIFICATE_CRT_FOLDER = os.getenv("CERTIFICATE_CRT_FOLDER")
-    CERTIFICATE_KEY_FOLDER = os.getenv("CERTIFICATE_KEY_FOLDER")
-
-
-class TestingConfig(Config):
+# the config variables are upper case attributes, as Flask reads them
+# pylint: disable=invalid-name, too-many-instance-attributes
+
+
+class Config:  # pylint: disable=too-few-public-methods
+    """Config variables, read from the environment when the application is created"""
+
+    def __init__(self):  # pylint: disable=too-many-statements
+        load_dotenv()
+
+        self.PATH = os.path.dirname(__file__)
+
+        self.SECRET_KEY = os.getenv("SECRET_KEY")
+        self.SECURITY_PASSWORD_SALT = os.getenv("SECURITY_PASSWORD_SALT")
+
+        # Mail config
+        self.MAIL_SERVER = os.getenv("MAIL_SERVER")
+        self.MAIL_PORT = 465
+        self.MAIL_USE_TLS = False
+        self.MAIL_USE_SSL = True
+        self.MAIL_DEBUG = False
+        self.MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+        self.MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+
+        self.MAIL_EXPIRATION = int(os.getenv("MAIL_EXPIRATION"))
+        self.EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "3"))
+        self.EMAIL_RETRY_BACKOFF = int(os.getenv("EMAIL_RETRY_BACKOFF", "30"))
+        self.EMAIL_DEAD_LETTER_QUEUE = os.getenv("EMAIL_DEAD_LETTER_QUEUE", "email-dead-letter")
+        # Reload the email templates when they are modified, for development
+        self.EMAIL_TEMPLATES_AUTO_RELOAD = os.getenv("EMAIL_TEMPLATES_AUTO_RELOAD", "false").lower() == "true"
+
+        self.UNIVERSITY_EMAIL_DOMAIN = os.getenv("UNIVERSITY_EMAIL_DOMAIN")
+
+        self.MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH"))
+        self.PFP_UPLOAD_FOLDER = os.getenv("PFP_UPLOAD_FOLDER")
+        self.LICENSE_UPLOAD_FOLDER = os.getenv("LICENSE_UPLOAD_FOLDER")
+        self.ID_CARD_UPLOAD_FOLDER = os.getenv("ID_CARD_UPLOAD_FOLDER")
+        self.SCHOOL_CERTIFICATE_UPLOAD_FOLDER = os.getenv("SCHOOL_CERTIFICATE_UPLOAD_FOLDER")
+        self.INSURANCE_UPLOAD_FOLDER = os.getenv("INSURANCE_UPLOAD_FOLDER")
+
+        # Storage config, "local" or "s3"
+        self.STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+        self.S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+        self.S3_REGION = os.getenv("S3_REGION")
+        self.S3_BUCKET = os.getenv("S3_BUCKET")
+        self.S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+        self.S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+
+        # Response compression config, responses smaller than COMPRESS_MIN_SIZE bytes are not compressed
+        self.COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+        self.COMPRESS_LEVEL = {"gzip": 6, "br": 5}
+
+        # Password hashing config, bcrypt runs in PASSWORD_HASH_WORKERS threads
+        # and the checks are refused when PASSWORD_HASH_MAX_PENDING are already pending
+        self.BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        self.PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+        self.PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+        # JWT config
+        # Salt shared by the passwords hashed before they had their own salt, to rehash them on login
+        self.JWT_SALT = os.getenv("JWT_SALT").encode("utf8")
+        self.JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+        self.JWT_TOKEN_LOCATION = ["cookies"]
+        self.JWT_COOKIE_SECURE = True
+        self.JWT_COOKIE_CSRF_PROTECT = False
+        self.JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES")))
+        self.JWT_ACCESS_TOKEN_REFRESH = timedelta(seconds=int(os.getenv("JWT_ACCESS_TOKEN_REFRESH")))
+        self.JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES")))
+        self.JWT_COOKIE_SAMESITE = "None"
+        # RQ config
+        self.CACHE_TYPE = os.getenv("CACHE_TYPE")
+        self.RQ_REDIS_URL = os.getenv("RQ_REDIS_URL")
+
+        # Cache config
+        self.CACHE_REDIS_HOST = os.getenv("CACHE_REDIS_HOST")
+        self.CACHE_REDIS_PORT = os.getenv("CACHE_REDIS_PORT")
+        self.CACHE_REDIS_PASSWORD = os.getenv("CACHE_REDIS_PASSWORD")
+        self.CACHE_REDIS_DB = os.getenv("CACHE_REDIS_DB")
+
+        # Seconds the users are cached in redis, and in the memory of each process
+        self.USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", "300"))
+        self.USER_CACHE_LOCAL_TIMEOUT = int(os.getenv("USER_CACHE_LOCAL_TIMEOUT", "5"))
+        self.USER_CACHE_LOCAL_MAX_SIZE = 1024
+
+        # Seconds the admin dashboard statistics are cached
+        self.STATISTICS_CACHE_TIMEOUT = int(os.getenv("STATISTICS_CACHE_TIMEOUT", "30"))
+
+        # Authentication attempts allowed per ip and per login in a sliding window of seconds
+        self.LOGIN_RATE_LIMIT_WINDOW = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "60"))
+        self.LOGIN_RATE_LIMIT_IP = int(os.getenv("LOGIN_RATE_LIMIT_IP", "20"))
+        self.LOGIN_RATE_LIMIT_LOGIN = int(os.getenv("LOGIN_RATE_LIMIT_LOGIN", "5"))
+        # Failed authentications of a login before it is locked out, and seconds of the lockout
+        self.LOGIN_LOCKOUT_THRESHOLD = int(os.getenv("LOGIN_LOCKOUT_THRESHOLD", "10"))
+        self.LOGIN_LOCKOUT_DURATION = int(os.getenv("LOGIN_LOCKOUT_DURATION", "900"))
+        # Reverse proxies in front of gunicorn trusted for the client ip in X-Forwarded-For, 0 when it is exposed
+        self.PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", "0"))
+
+        self.FRONT_END_URL = os.getenv("FRONT_END_URL")
+
+        # DB config
+        self.DB_HOST = os.getenv("DB_HOST")
+        self.DB_NAME = os.getenv("DB_NAME")
+        self.DB_USER = os.getenv("DB_USER")
+        self.DB_PWD = os.getenv("DB_PWD")
+        self.DB_PORT = os.getenv("DB_PORT", "5432")
+
+        self.TESTING = False
+        self.DEBUG = False
+
+        # University address
+        self.UNIVERSITY_STREET_NUMBER = str(os.getenv("UNIVERSITY_STREET_NUMBER"))
+        self.UNIVERSITY_STREET_NAME = str(os.getenv("UNIVERSITY_STREET_NAME"))
+        self.UNIVERSITY_CITY = str(os.getenv("UNIVERSITY_CITY"))
+        self.UNIVERSITY_POSTAL_CODE = str(os.getenv("UNIVERSITY_POSTAL_CODE"))
+
+        # Api key for google maps
+        self.GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+        self.ROUTE_CHECKER = os.getenv("ROUTE_CHECKER")
+
+        self.RATE_PER_KM = float(os.getenv("RATE_PER_KM"))
+        self.COST_PER_KM = float(os.getenv("COST_PER_KM"))
+        self.BASE_RATE = float(os.getenv("BASE_RATE"))
+
+        self.ACCEPT_TIME_DIFFERENCE_MINUTES = int(os.getenv("ACCEPT_TIME_DIFFERENCE_MINUTES"))
+
+        # FLask configuration
+        self.FLASK_DEBUG = os.getenv("FLASK_DEBUG")
+        self.FLASK_HOST = os.getenv("FLASK_HOST")
+        self.FLASK_PORT = os.getenv("FLASK_PORT")
+
+        # CERTS
+        self.CERTIFICATE_CRT_FOLDER = os.getenv("CERTIFICATE_CRT_FOLDER")
+        self.CERTIFICATE_KEY_FOLDER = os.getenv("CERTIFICATE_KEY_FOLDER")
+
+
+class TestingConfig(Config):  # pylint: disable=too-few-public-methods
     """Testing Config variables"""
 
-    UNIVERSITY_EMAIL_DOMAIN = "university.com"
-    TESTING = True
-    DB_HOST = ""
+    def __init__(self):
+        super().__init__()
+        self.UNIVERSITY_EMAIL_DOMAIN = "university.com"
+        self.BCRYPT_ROUNDS = 4
+        self.TESTING = True
+        self.DB_HOST = ""
+
+
+# pylint: enable=invalid-name, too-many-instance-attributes
 
 
 def config(filename="config.ini", section="postgresql"):
@@ -2,6 +2,9 @@
 # !/usr/bin/python
 
 from configparser import NoSectionError
+import queue
+import threading
+import uuid
 import psycopg2
 import psycopg2.extras
 from uniride_sme import app
@@ -49,8 +52,10 @@ def disconnect(conn):
     print("Database connection closed.")
 
 
-def execute_command(conn, query, params=None):
-    """Execute a SQL command"""
+def execute_command(conn, query, params=None, commit=True):
+    """Execute a SQL command
+    :param commit: False to execute it in a transaction committed by the caller
+    """
     cur = conn.cursor()
 
     returning_value = None
@@ -64,7 +69,8 @@ def execute_command(conn, query, params=None):
     # Close communication with the PostgreSQL database server
     cur.close()
     # Commit the changes
-    conn.commit()
+    if commit:
+        conn.commit()
     return returning_value
 
 
@@ -86,5 +92,105 @@ def get_query(conn, query, params=None, return_dict=False):
     return rows
 
 
+def iter_query(conn, query, params=None, return_dict=False, itersize=2000):
+    """Query data from db with a server-side cursor, the rows are fetched itersize at a time while they are iterated
+    The connection must stay open until the end of the iteration
+    """
+    print(query)
+    print("params", params)
+    cursor_factory = psycopg2.extras.RealDictCursor if return_dict else None
+    cur = conn.cursor(name=f"iter_query_{uuid.uuid4().hex}", cursor_factory=cursor_factory)
+    cur.itersize = itersize
+    try:
+        cur.execute(query, params)
+        yield from cur
+    finally:
+        cur.close()
+
+
+class CopyCancelledError(Exception):
+    """Exception for when the reader of a COPY stops before its end"""
+
+
+class _QueueWriter:
+    """File-like object the COPY writes to, the data is buffered then passed to the reader through a queue"""
+
+    def __init__(self, chunks, cancelled, buffer_size):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+
+    def put(self, data):
+        """Pass data to the reader, waiting while the queue is full unless the reader stopped"""
+        while True:
+            if self.cancelled.is_set():
+                raise CopyCancelledError()
+            try:
+                self.chunks.put(data, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, data):
+        """Buffer a row written by the COPY"""
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        """Pass the buffered rows to the reader"""
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer = bytearray()
+
+
+def iter_copy(conn, query, params=None, buffer_size=65536, max_pending=16):
+    """Export the rows of a query as CSV with a header with COPY ... TO STDOUT, the data is yielded while the
+    COPY runs in a thread, at most max_pending chunks of buffer_size bytes are waiting to be read
+    The connection must stay open until the end of the iteration
+    """
+    select = conn.cursor().mogrify(query, params).decode("utf-8")
+    command = f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    print(command)
+
+    chunks = queue.Queue(maxsize=max_pending)
+    cancelled = threading.Event()
+    errors = []
+
+    def copy():
+        cur = conn.cursor()
+        writer = _QueueWriter(chunks, cancelled, buffer_size)
+        try:
+            cur.copy_expert(command, writer)
+            writer.flush()
+        except (psycopg2.Error, CopyCancelledError) as error:
+            errors.append(error)
+        finally:
+            cur.close()
+            try:
+                # end of the data
+                writer.put(None)
+            except CopyCancelledError:
+                pass
+
+    thread = threading.Thread(target=copy, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while (chunk := chunks.get()) is not None:
+            yield chunk
+        finished = True
+    finally:
+        if not finished:
+            # the reader stopped early, e.g. the client disconnected, the COPY is stopped too
+            cancelled.set()
+            conn.cancel()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
 if __name__ == "__main__":
     connect()
@@ -1,8 +1,9 @@
 """ This module contains the AddressBO class. """
 import dataclasses
+from datetime import datetime
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class AddressBO:  # pylint: disable=too-many-instance-attributes
     """Address business object"""
 
@@ -13,7 +14,7 @@ class AddressBO:  # pylint: disable=too-many-instance-attributes
     postal_code: str = None
     latitude: float = None
     longitude: float = None
-    timestamp_modification = None
+    timestamp_modification: datetime = None
 
     def get_full_address(self) -> str:
         """Return a simple concatenated full address string"""
@@ -4,7 +4,7 @@ from typing import Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class BookBO:  # pylint: disable=too-many-instance-attributes
     """Book business object class"""
 
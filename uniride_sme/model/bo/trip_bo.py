@@ -2,12 +2,10 @@
 import dataclasses
 from datetime import datetime
 
-from uniride_sme import app
 from uniride_sme.model.bo.address_bo import AddressBO
-from uniride_sme.utils.cartography.route_checker_factory import RouteCheckerFactory
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class TripBO:  # pylint: disable=too-many-instance-attributes
     """Business object of the trip"""
 
@@ -21,4 +19,3 @@ class TripBO:  # pylint: disable=too-many-instance-attributes
     user_id: int = None
     departure_address: AddressBO = None
     arrival_address: AddressBO = None
-    route_checker = RouteCheckerFactory.create_route_checker(app.config["ROUTE_CHECKER"])
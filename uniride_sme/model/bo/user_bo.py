@@ -3,7 +3,7 @@ import dataclasses
 from datetime import datetime
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class UserBO:
     """User business object class"""
 
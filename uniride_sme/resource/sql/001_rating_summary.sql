@@ -0,0 +1,69 @@
+-- Running sum and count of the ratings of each user, and of each user for each criterion.
+-- They are maintained by a trigger on ur_rating, so the averages are read without scanning the ratings.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS uniride.ur_rating_summary (
+    u_id INTEGER PRIMARY KEY REFERENCES uniride.ur_user (u_id) ON DELETE CASCADE,
+    rs_sum NUMERIC NOT NULL DEFAULT 0,
+    rs_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS uniride.ur_rating_criteria_summary (
+    u_id INTEGER NOT NULL REFERENCES uniride.ur_user (u_id) ON DELETE CASCADE,
+    rc_id INTEGER NOT NULL REFERENCES uniride.ur_rating_criteria (rc_id) ON DELETE CASCADE,
+    rcs_sum NUMERIC NOT NULL DEFAULT 0,
+    rcs_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (u_id, rc_id)
+);
+
+CREATE OR REPLACE FUNCTION uniride.ur_rating_summary_update() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE uniride.ur_rating_summary
+        SET rs_sum = rs_sum - OLD.n_value, rs_count = rs_count - 1
+        WHERE u_id = OLD.u_id;
+
+        UPDATE uniride.ur_rating_criteria_summary
+        SET rcs_sum = rcs_sum - OLD.n_value, rcs_count = rcs_count - 1
+        WHERE u_id = OLD.u_id AND rc_id = OLD.rc_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO uniride.ur_rating_summary (u_id, rs_sum, rs_count)
+        VALUES (NEW.u_id, NEW.n_value, 1)
+        ON CONFLICT (u_id) DO UPDATE
+        SET rs_sum = ur_rating_summary.rs_sum + EXCLUDED.rs_sum, rs_count = ur_rating_summary.rs_count + 1;
+
+        INSERT INTO uniride.ur_rating_criteria_summary (u_id, rc_id, rcs_sum, rcs_count)
+        VALUES (NEW.u_id, NEW.rc_id, NEW.n_value, 1)
+        ON CONFLICT (u_id, rc_id) DO UPDATE
+        SET rcs_sum = ur_rating_criteria_summary.rcs_sum + EXCLUDED.rcs_sum,
+            rcs_count = ur_rating_criteria_summary.rcs_count + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ur_rating_summary_trigger ON uniride.ur_rating;
+CREATE TRIGGER ur_rating_summary_trigger
+AFTER INSERT OR UPDATE OF n_value, u_id, rc_id OR DELETE ON uniride.ur_rating
+FOR EACH ROW EXECUTE FUNCTION uniride.ur_rating_summary_update();
+
+-- Backfill from the existing ratings, no rating can be added meanwhile
+LOCK TABLE uniride.ur_rating IN SHARE MODE;
+
+TRUNCATE uniride.ur_rating_summary, uniride.ur_rating_criteria_summary;
+
+INSERT INTO uniride.ur_rating_summary (u_id, rs_sum, rs_count)
+SELECT u_id, SUM(n_value), COUNT(*)
+FROM uniride.ur_rating
+GROUP BY u_id;
+
+INSERT INTO uniride.ur_rating_criteria_summary (u_id, rc_id, rcs_sum, rcs_count)
+SELECT u_id, rc_id, SUM(n_value), COUNT(*)
+FROM uniride.ur_rating
+GROUP BY u_id, rc_id;
+
+COMMIT;
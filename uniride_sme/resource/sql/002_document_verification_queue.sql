@@ -0,0 +1,9 @@
+-- Indexes of the queue of documents to verify, ordered by modification date and paginated with a keyset.
+
+CREATE INDEX IF NOT EXISTS ur_documents_timestamp_modification_idx
+ON uniride.ur_documents (d_timestamp_modification, u_id);
+
+CREATE INDEX IF NOT EXISTS ur_document_verification_pending_idx
+ON uniride.ur_document_verification (u_id)
+WHERE v_license_verified IN (0, -1) OR v_id_card_verified IN (0, -1)
+   OR v_school_certificate_verified IN (0, -1) OR v_insurance_verified IN (0, -1);
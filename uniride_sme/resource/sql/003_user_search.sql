@@ -0,0 +1,9 @@
+-- Indexes of the admin users listing, filtered by role and searched by prefix of name or email.
+
+CREATE INDEX IF NOT EXISTS ur_user_role_idx ON uniride.ur_user (r_id);
+
+CREATE INDEX IF NOT EXISTS ur_user_lastname_prefix_idx ON uniride.ur_user (lower(u_lastname) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS ur_user_firstname_prefix_idx ON uniride.ur_user (lower(u_firstname) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS ur_user_student_email_prefix_idx ON uniride.ur_user (lower(u_student_email) text_pattern_ops);
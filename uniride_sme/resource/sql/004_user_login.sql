@@ -0,0 +1,5 @@
+-- Indexes of the authentication, the login and the case insensitive student email are looked up in one query.
+
+CREATE UNIQUE INDEX IF NOT EXISTS ur_user_login_idx ON uniride.ur_user (u_login);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ur_user_student_email_lower_idx ON uniride.ur_user (lower(u_student_email));
@@ -1,12 +1,12 @@
 """Rest API"""
 # !/usr/bin/env python
 # -*- coding: utf-8 -*-
-import json
 import os
-from datetime import datetime
 from flask import jsonify
-from flask_jwt_extended import get_jwt, get_jwt_identity, create_access_token, set_access_cookies
-from uniride_sme import app
+from werkzeug.middleware.proxy_fix import ProxyFix
+from uniride_sme import app, cors, api, mail, jwt, rq, cache
+from uniride_sme.config import Config
+from uniride_sme.cli import export_command
 from uniride_sme.route.user_route import user
 from uniride_sme.route.admin_route import admin
 from uniride_sme.route.trip_route import trip
@@ -14,59 +14,57 @@ from uniride_sme.route.address_route import address
 from uniride_sme.route.car_route import car
 from uniride_sme.route.book_route import book
 from uniride_sme.route.about_route import about
+from uniride_sme.service import admin_service, documents_service
+from uniride_sme.utils import json_provider
+from uniride_sme.utils.compression import compress_response
+from uniride_sme.utils.jwt_token import refresh_expiring_jwts
 
+BLUEPRINTS = (user, admin, trip, address, car, book, about)
 
-@app.after_request
-def reformat_jwt_response(response):
-    """Reformat the response for jwt errors"""
-    response_json = response.get_json()
-    if response_json and "msg" in response_json:
-        message = ""
-        if not response_json["msg"].lower().startswith("token"):
-            message = "TOKEN_"
-        message += response_json["msg"].split(":")[0].replace(" ", "_").upper()
 
-        response_json["message"] = message
-        del response_json["msg"]
-        response.data = json.dumps(response_json)
-    return response
+def file_too_large(e):  # pylint: disable=unused-argument
+    """Return a custom response when a file is too large"""
+    return jsonify(message="FILE_TOO_LARGE"), 413
 
 
-@app.after_request
-def refresh_expiring_jwts(response):
-    """Refresh the jwt token"""
-    try:
-        exp_timestamp = get_jwt()["exp"]
-        now = datetime.now()
-        target_timestamp = datetime.timestamp(now + app.config["JWT_ACCESS_TOKEN_REFRESH"])
-        if target_timestamp > exp_timestamp:
-            access_token = create_access_token(get_jwt_identity())
-            set_access_cookies(response, access_token)
-        return response
-    except (RuntimeError, KeyError):
-        return response
+def create_app(config=None):
+    """Get the application, configured with its extensions, blueprints and hooks on the first call
+    :param config: config object, Config() read from the environment by default
+    """
+    if "user" in app.blueprints:
+        return app
 
+    app.config.from_object(config or Config())
+    for extension in (cors, api, mail, jwt, rq, cache):
+        extension.init_app(app)
+    if json_provider.orjson is not None:
+        app.json = json_provider.ORJSONProvider(app)
+    # the client ip, used by the login rate limit, is the one forwarded by the reverse proxy
+    if app.config["PROXY_FIX_X_FOR"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
 
-@app.errorhandler(413)
-def file_too_large(e):  # pylint: disable=unused-argument
-    """Return a custom response when a file is too large"""
-    return jsonify(message="FILE_TOO_LARGE"), 413
+    # the memoized statistics are declared before the config is read
+    for function in (admin_service.get_statistics, documents_service.document_number_status):
+        function.cache_timeout = app.config["STATISTICS_CACHE_TIMEOUT"]
+
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+    # registered first so it runs after the other after_request functions, on the final body
+    app.after_request(compress_response)
+    app.after_request(refresh_expiring_jwts)
+    app.register_error_handler(413, file_too_large)
+    app.cli.add_command(export_command)
+    return app
 
 
 if __name__ == "__main__":
+    create_app()
     currentPath = os.path.dirname(__file__)
     cert = os.path.join(currentPath, app.config["CERTIFICATE_CRT_FOLDER"])
     key = os.path.join(currentPath, app.config["CERTIFICATE_KEY_FOLDER"])
     context = (cert, key)  # certificate and key files
 
-    app.register_blueprint(user)
-    app.register_blueprint(admin)
-    app.register_blueprint(trip)
-    app.register_blueprint(address)
-    app.register_blueprint(car)
-    app.register_blueprint(book)
-    app.register_blueprint(about)
-    # Launch Flask server0
+    # Launch Flask development server, see uniride_sme/wsgi.py in production
     app.run(
         debug=app.config["FLASK_DEBUG"],
         host=app.config["FLASK_HOST"],
@@ -1,29 +1,41 @@
 """About route module."""
 
-from flask import Blueprint, jsonify
-from uniride_sme.utils.exception.exceptions import ApiException
+from flask import Blueprint, request, make_response
 from uniride_sme.utils import about as about_utils
+from uniride_sme.utils.compression import get_accepted_encoding
 
 about = Blueprint("about", __name__, url_prefix="/about")
 
+ABOUT_PAGE_MAX_AGE = 86400
+
+
+def _page_response(name):
+    """Build the response of an about page, 304 if the client already has it"""
+    page = about_utils.get_page(name)
+    encoding = get_accepted_encoding(request)
+    # a strong ETag identifies the bytes sent, so each encoding has its own
+    etag = f"{page['etag']}-{encoding}" if encoding else page["etag"]
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        response = make_response(page["bodies"][encoding], 200)
+        response.mimetype = "application/json"
+        if encoding:
+            response.content_encoding = encoding
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = ABOUT_PAGE_MAX_AGE
+    return response
+
 
 @about.route("/conditions", methods=["GET"])
 def get_conditions():
     """Get conditions of use"""
-    try:
-        conditions = about_utils.get_conditions()
-        response = jsonify(conditions=conditions), 200
-    except ApiException as e:
-        response = jsonify(message=e.message), e.status_code
-    return response
+    return _page_response("conditions")
 
 
 @about.route("/privacy", methods=["GET"])
 def get_privacy():
     """Get privacy policy"""
-    try:
-        privacy = about_utils.get_privacy()
-        response = jsonify(privacy=privacy), 200
-    except ApiException as e:
-        response = jsonify(message=e.message), e.status_code
-    return response
+    return _page_response("privacy")
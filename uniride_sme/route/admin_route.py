@@ -1,11 +1,11 @@
 """Admin route"""
 from flask import Blueprint, request, jsonify
-from uniride_sme.model.dto.trip_dto import TripStatusDTO
-from uniride_sme.service import admin_service, documents_service, user_service, trip_service
-from uniride_sme.model.dto.user_dto import InformationsStatUsers
+from uniride_sme.service import admin_service, documents_service, user_service
 from uniride_sme.utils.exception.exceptions import ApiException
 from uniride_sme.utils import email
 from uniride_sme.utils.role_user import RoleUser, role_required
+from uniride_sme.utils.pagination import generate_pagination_metadata, get_pagination_parameters
+from uniride_sme.utils.export import export_response, get_export_format, csv_response, get_date_parameter
 
 admin = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -15,8 +15,17 @@ admin = Blueprint("admin", __name__, url_prefix="/admin")
 def users_informations():
     """Get users information"""
     try:
-        informations_user = admin_service.users_information()
-        response = jsonify({"message": "USER_DISPLAYED_SUCESSFULLY", "users": informations_user}), 200
+        page, page_size = get_pagination_parameters(request)
+        informations_user, total_count = admin_service.users_information(
+            page,
+            page_size,
+            sort=request.args.get("sort", "id"),
+            order=request.args.get("order", "asc"),
+            role=request.args.get("role", type=int),
+            search=request.args.get("search"),
+        )
+        meta = generate_pagination_metadata(page, page_size, total_count)
+        response = jsonify({"message": "USER_DISPLAYED_SUCESSFULLY", "users": informations_user, "meta": meta}), 200
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
     return response
@@ -54,19 +63,17 @@ def user_information_token(user_id):
 def user_stat_id(user_id):
     """Informations user by token"""
     try:
-        user_stat_passenger = admin_service.user_stat_passenger(user_id)
-        user_stat_driver = admin_service.user_stat_driver(user_id)
-        average_rating = admin_service.average_rating_user_id(user_id)
+        user_statistics = admin_service.user_statistics(user_id)
         response_data = {
             "statistics": [
                 {
-                    "driver_trip": user_stat_driver,
+                    "driver_trip": user_statistics["driver_trip"],
                 },
                 {
-                    "passenger_trip": user_stat_passenger,
+                    "passenger_trip": user_statistics["passenger_trip"],
                 },
                 {
-                    "average_rating": average_rating,
+                    "average_rating": user_statistics["average_rating"],
                 },
             ]
         }
@@ -80,17 +87,24 @@ def user_stat_id(user_id):
     return response
 
 
+@admin.route("/users-statistics", methods=["GET"])
+@role_required(RoleUser.ADMINISTRATOR)
+def users_statistics():
+    """Statistics of several users, given with user_id query parameters"""
+    try:
+        users_statistics_infos = admin_service.users_statistics(request.args.getlist("user_id", type=int))
+        response = jsonify({"message": "USERS_STATS_DISPLAYED_SUCESSFULLY", "statistics": users_statistics_infos}), 200
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
+
+
 @admin.route("/trip-number", methods=["GET"])
 @role_required(RoleUser.ADMINISTRATOR)
 def trip_count():
     """Trip count"""
     try:
-        trip_count_status = TripStatusDTO(
-            trip_pending=trip_service.trips_status(1),
-            trip_canceled=trip_service.trips_status(2),
-            trip_completed=trip_service.trips_status(3),
-            trip_oncourse=trip_service.trips_status(4),
-        )
+        trip_count_status = admin_service.get_statistics()["trip_infos"]
         response = jsonify({"message": "TRIP_NUMBER_DISPLAYED_SUCCESSFULLY", "trip_infos": trip_count_status}), 200
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
@@ -102,12 +116,7 @@ def trip_count():
 def user_count():
     """User count"""
     try:
-        stats_user_infos_dto = InformationsStatUsers(
-            admin_count_value=admin_service.count_role_user(0),
-            drivers_count_value=admin_service.count_role_user(1),
-            passenger_count_value=admin_service.count_role_user(2),
-            pending_count_value=admin_service.count_role_user(3),
-        )
+        stats_user_infos_dto = admin_service.get_statistics()["user_infos"]
 
         response = jsonify({"message": "USER_NUMBER_SUCCESSFULLY", "user_infos": stats_user_infos_dto}), 200
     except ApiException as e:
@@ -115,13 +124,32 @@ def user_count():
     return response
 
 
+@admin.route("/statistics", methods=["GET"])
+@role_required(RoleUser.ADMINISTRATOR)
+def statistics():
+    """Users and trips counts of the dashboard"""
+    try:
+        statistics_infos = admin_service.get_statistics()
+        response = jsonify({"message": "STATISTICS_DISPLAYED_SUCCESSFULLY", **statistics_infos}), 200
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
+
+
 @admin.route("/verify/document", methods=["GET"])
 @role_required(RoleUser.ADMINISTRATOR)
 def verify_document():
     """Get documents to verify"""
     try:
-        doc_bo_list = documents_service.document_to_verify()
-        response = jsonify({"message": "DOCUMENT_VERIFIED_SUCCESSFULLY", "request": doc_bo_list}), 200
+        doc_bo_list, next_cursor = documents_service.document_to_verify(
+            request.args.get("after"),
+            request.args.get("after_id"),
+            request.args.get("limit", 10, type=int),
+        )
+        response = (
+            jsonify({"message": "DOCUMENT_VERIFIED_SUCCESSFULLY", "request": doc_bo_list, "next": next_cursor}),
+            200,
+        )
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
     return response
@@ -232,8 +260,13 @@ def update_label():
 def get_ranking_drivers():
     """Get ranking drivers"""
     try:
-        data = admin_service.users_ranking(1)
-        response = jsonify({"message": "DRIVERS_RATING_CRITERIA_DISPLAYED_SUCCESSFULLY", "ranking": data}), 200
+        page, page_size = get_pagination_parameters(request)
+        data, total_count = admin_service.users_ranking(1, page, page_size)
+        meta = generate_pagination_metadata(page, page_size, total_count)
+        response = (
+            jsonify({"message": "DRIVERS_RATING_CRITERIA_DISPLAYED_SUCCESSFULLY", "ranking": data, "meta": meta}),
+            200,
+        )
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
     return response
@@ -243,8 +276,13 @@ def get_ranking_drivers():
 def get_ranking_passengers():
     """Get ranking passengers"""
     try:
-        data = admin_service.users_ranking(2)
-        response = jsonify({"message": "PASSENGERS_RATING_CRITERIA_DISPLAYED_SUCCESSFULLY", "ranking": data}), 200
+        page, page_size = get_pagination_parameters(request)
+        data, total_count = admin_service.users_ranking(2, page, page_size)
+        meta = generate_pagination_metadata(page, page_size, total_count)
+        response = (
+            jsonify({"message": "PASSENGERS_RATING_CRITERIA_DISPLAYED_SUCCESSFULLY", "ranking": data, "meta": meta}),
+            200,
+        )
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
     return response
@@ -260,3 +298,48 @@ def get_actif_criterian(r_id):
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
     return response
+
+
+@admin.route("/export/users", methods=["GET"])
+@role_required(RoleUser.ADMINISTRATOR)
+def export_users():
+    """Export all the users, streamed as json, ndjson or csv"""
+    try:
+        response = export_response(admin_service.export_users(), get_export_format(request), "users")
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
+
+
+@admin.route("/export/documents", methods=["GET"])
+@role_required(RoleUser.ADMINISTRATOR)
+def export_documents():
+    """Export the documents of all the users, streamed as json, ndjson or csv"""
+    try:
+        response = export_response(admin_service.export_documents(), get_export_format(request), "documents")
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
+
+
+@admin.route("/export/ratings", methods=["GET"])
+@role_required(RoleUser.ADMINISTRATOR)
+def export_ratings():
+    """Export all the ratings, streamed as json, ndjson or csv"""
+    try:
+        response = export_response(admin_service.export_ratings(), get_export_format(request), "ratings")
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
+
+
+@admin.route("/bulk-export/<name>", methods=["GET"])
+@role_required(RoleUser.ADMINISTRATOR)
+def bulk_export(name):
+    """Export the trips, bookings, ratings or users between two dates as CSV, streamed from a COPY"""
+    try:
+        chunks = admin_service.bulk_export(name, get_date_parameter(request, "from"), get_date_parameter(request, "to"))
+        response = csv_response(chunks, name)
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
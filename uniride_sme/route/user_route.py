@@ -1,4 +1,5 @@
 """User related endpoints"""
+import mimetypes
 from flask import Blueprint, request, jsonify, send_file, make_response
 from flask_jwt_extended import (
     get_jwt_identity,
@@ -16,11 +17,15 @@ from jwt import ExpiredSignatureError
 from uniride_sme import app
 from uniride_sme.service import user_service, documents_service
 from uniride_sme.model.dto.user_dto import UserInfosDTO, DriverInfosDTO
-from uniride_sme.utils.exception.exceptions import ApiException
-from uniride_sme.utils.exception.user_exceptions import EmailAlreadyVerifiedException
-from uniride_sme.utils import email
-from uniride_sme.utils.file import get_encoded_file
-from uniride_sme.utils.jwt_token import revoke_token
+from uniride_sme.utils.exception.exceptions import ApiException, FileException
+from uniride_sme.utils.exception.user_exceptions import (
+    EmailAlreadyVerifiedException,
+    PasswordIncorrectException,
+    UserNotFoundException,
+)
+from uniride_sme.utils import email, rate_limit
+from uniride_sme.utils.file import get_encoded_file, get_file_etag, get_content_hash, read_file, file_exists
+from uniride_sme.utils.jwt_token import revoke_token, get_fresh_identity
 from uniride_sme.utils.role_user import RoleUser, role_required
 
 user = Blueprint("user", __name__, url_prefix="/user")
@@ -43,8 +48,8 @@ def register():
             form.get("phone_number", None),
             form.get("description", None),
             request.files.get("pfp", None),
+            request.files,
         )
-        documents_service.add_documents(user_bo.id, request.files)
         email.send_verification_email(user_bo.student_email, user_bo.firstname, True)
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
@@ -56,8 +61,11 @@ def register():
 def authenticate():
     """Authenfication endpoint"""
     json_object = request.json
+    login = json_object.get("login", None)
     try:
-        user_bo = user_service.authenticate(json_object.get("login", None), json_object.get("password", None))
+        rate_limit.check_login(request.remote_addr, login)
+        user_bo = user_service.authenticate(login, json_object.get("password", None))
+        rate_limit.record_success(login)
         response = make_response(jsonify(message="AUTHENTIFIED_SUCCESSFULLY", email_verified=user_bo.email_verified))
 
         access_token = create_access_token({"id": user_bo.id, "role": user_bo.r_id})
@@ -66,6 +74,9 @@ def authenticate():
             refresh_token = create_refresh_token({"id": user_bo.id, "role": user_bo.r_id})
             set_refresh_cookies(response, refresh_token)
         response.status_code = 200
+    except (UserNotFoundException, PasswordIncorrectException) as e:
+        rate_limit.record_failure(login)
+        response = jsonify(message=e.message), e.status_code
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
 
@@ -76,10 +87,15 @@ def authenticate():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh token endpoint"""
-    response = jsonify(message="REFRESHED_SUCCESSFULLY")
-    access_token = create_access_token(get_jwt_identity())
-    set_access_cookies(response, access_token)
-    return response, 200
+    try:
+        # the role in the refresh token is reloaded if it changed since it was created
+        access_token = create_access_token(get_fresh_identity(set_cookie=False))
+        response = make_response(jsonify(message="REFRESHED_SUCCESSFULLY"))
+        set_access_cookies(response, access_token)
+        response.status_code = 200
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
 
 
 @user.route("/logout", methods=["DELETE"])
@@ -132,10 +148,9 @@ def get_infos():
 @jwt_required()
 def get_user_id():
     """Get user ID and his role ID"""
-    user_id = get_jwt_identity()["id"]
     try:
-        user_role = user_service.get_user_role(user_id)
-        response = jsonify(user_role), 200
+        user_role = get_fresh_identity()
+        response = jsonify(role=user_role["role"], id=user_role["id"]), 200
     except ApiException as e:
         response = jsonify(message=e.message), e.status_code
     return response
@@ -235,6 +250,35 @@ def save_pfp():
     return response
 
 
+@user.route("/pfp/<file_name>", methods=["GET"])
+@jwt_required()
+def get_profile_picture(file_name):
+    """Get profile picture endpoint, the content hash in the file name is used as ETag"""
+    try:
+        etag = get_file_etag(file_name)
+        if etag is not None and etag in request.if_none_match:
+            if not file_exists(file_name, "PFP_UPLOAD_FOLDER"):
+                raise FileException("FILE_NOT_FOUND", 404)
+            response = make_response("", 304)
+        else:
+            response = make_response(read_file(file_name, "PFP_UPLOAD_FOLDER"))
+            response.mimetype = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        response.cache_control.private = True
+        if etag is not None:
+            # The file name changes with its content, so the file can be cached forever
+            response.set_etag(etag)
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        else:
+            # The legacy file names don't change with their content, so the file is revalidated
+            response.set_etag(get_content_hash(response.get_data()))
+            response.cache_control.no_cache = True
+            response.make_conditional(request)
+    except ApiException as e:
+        response = jsonify(message=e.message), e.status_code
+    return response
+
+
 @user.route("documents/infos", methods=["GET"])
 @jwt_required()
 def get_user_documents_infos():
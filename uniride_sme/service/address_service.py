@@ -1,5 +1,6 @@
 """Address service module"""
 
+import dataclasses
 from datetime import datetime
 import requests
 
@@ -35,9 +36,10 @@ def add_address(address: AddressBO) -> AddressBO:
 
         # retrieve not None values
         attr_dict = {}
-        for attr, value in address.__dict__.items():
+        for field in dataclasses.fields(address):
+            value = getattr(address, field.name)
             if value:
-                attr_dict["a_" + attr] = value
+                attr_dict["a_" + field.name] = value
 
         # format for sql query
         fields = ", ".join(attr_dict.keys())
@@ -1,5 +1,8 @@
 """Admin service module"""
-from uniride_sme import connect_pg
+import re
+from uniride_sme import cache, connect_pg
+from uniride_sme.model.dto.trip_dto import TripStatusDTO
+from uniride_sme.model.dto.user_dto import InformationsStatUsers
 from uniride_sme.utils.exception.exceptions import (
     InvalidInputException,
 )
@@ -8,38 +11,113 @@ from uniride_sme.utils.exception.user_exceptions import (
     RatingNotFoundException,
 )
 from uniride_sme.utils.exception.criteria_exceptions import TooManyCriteriaException
-from uniride_sme.utils.file import get_encoded_file
+from uniride_sme.utils.file import get_encoded_file, get_pfp_url
+from uniride_sme.utils import user_cache
+from uniride_sme.utils.jwt_token import bump_token_version
+from uniride_sme.utils.role_user import RoleUser
+from uniride_sme.utils.trip_status import TripStatus
 
 
-def count_users() -> int:
-    """Get number of users"""
+@cache.memoize()
+def get_statistics():
+    """Get the number of users by role and of trips by status, with a single query"""
     conn = connect_pg.connect()
-    query = "SELECT COUNT(*) FROM uniride.ur_user"
-    result = connect_pg.get_query(conn, query)
-    connect_pg.disconnect(conn)
-    return result[0][0]
+    query = """
+        SELECT u.*, t.*
+        FROM (
+            SELECT COUNT(*) FILTER (WHERE r_id = %(administrator)s),
+                   COUNT(*) FILTER (WHERE r_id = %(driver)s),
+                   COUNT(*) FILTER (WHERE r_id = %(passenger)s),
+                   COUNT(*) FILTER (WHERE r_id = %(pending_user)s)
+            FROM uniride.ur_user
+        ) u
+        CROSS JOIN (
+            SELECT COUNT(*) FILTER (WHERE t_status = %(pending)s),
+                   COUNT(*) FILTER (WHERE t_status = %(canceled)s),
+                   COUNT(*) FILTER (WHERE t_status = %(completed)s),
+                   COUNT(*) FILTER (WHERE t_status = %(oncourse)s)
+            FROM uniride.ur_trip
+        ) t
+    """
+    params = {
+        "administrator": RoleUser.ADMINISTRATOR.value,
+        "driver": RoleUser.DRIVER.value,
+        "passenger": RoleUser.PASSENGER.value,
+        "pending_user": RoleUser.PENDING.value,
+        "pending": TripStatus.PENDING.value,
+        "canceled": TripStatus.CANCELED.value,
+        "completed": TripStatus.COMPLETED.value,
+        "oncourse": TripStatus.ONCOURSE.value,
+    }
+    try:
+        counts = connect_pg.get_query(conn, query, params)[0]
+    finally:
+        connect_pg.disconnect(conn)
 
+    return {
+        "user_infos": InformationsStatUsers(
+            admin_count_value=counts[0],
+            drivers_count_value=counts[1],
+            passenger_count_value=counts[2],
+            pending_count_value=counts[3],
+        ),
+        "trip_infos": TripStatusDTO(
+            trip_pending=counts[4],
+            trip_canceled=counts[5],
+            trip_completed=counts[6],
+            trip_oncourse=counts[7],
+        ),
+    }
 
-def count_role_user(role) -> int:
-    """Get number of user by role"""
-    conn = connect_pg.connect()
-    query = "SELECT COUNT(*) FROM uniride.ur_user WHERE r_id = %s"
-    result = connect_pg.get_query(conn, query, (role,))
-    connect_pg.disconnect(conn)
-    return result[0][0]
 
+USERS_SORT_COLUMNS = {
+    "id": "u_id",
+    "lastname": "u_lastname",
+    "firstname": "u_firstname",
+    "timestamp_creation": "u_timestamp_creation",
+    "last_modified_date": "u_timestamp_modification",
+}
+
+
+def users_information(page=1, page_size=10, sort="id", order="asc", role=None, search=None):
+    """Get users information
+    :param sort: one of USERS_SORT_COLUMNS
+    :param search: prefix of the lastname, the firstname or the student email of the users
+    :return: the users of the page and the total number of users matching the filters
+    """
+    if sort not in USERS_SORT_COLUMNS:
+        raise InvalidInputException("INVALID_SORT")
+    if order not in ("asc", "desc"):
+        raise InvalidInputException("INVALID_ORDER")
+
+    conditions = []
+    params = {"limit": page_size, "offset": (page - 1) * page_size}
+    if role is not None:
+        conditions.append("r_id = %(role)s")
+        params["role"] = role
+    if search:
+        # prefix search, using the lower(...) text_pattern_ops indexes
+        conditions.append(
+            "(lower(u_lastname) LIKE %(search)s OR lower(u_firstname) LIKE %(search)s"
+            " OR lower(u_student_email) LIKE %(search)s)"
+        )
+        params["search"] = re.sub(r"([\\%_])", r"\\\1", search.lower()) + "%"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
-def users_information():
-    """Get users information"""
     conn = connect_pg.connect()
     result = []
+    total_count = 0
 
     try:
-        query = """
-            SELECT u_id, r_id, u_lastname, u_firstname, u_profile_picture, u_timestamp_creation, u_timestamp_modification
+        query = f"""
+            SELECT u_id, r_id, u_lastname, u_firstname, u_profile_picture, u_timestamp_creation,
+                   u_timestamp_modification, COUNT(*) OVER () AS total_count
             FROM uniride.ur_user
+            {where}
+            ORDER BY {USERS_SORT_COLUMNS[sort]} {order}, u_id {order}
+            LIMIT %(limit)s OFFSET %(offset)s
         """
-        document = connect_pg.get_query(conn, query)
+        document = connect_pg.get_query(conn, query, params)
 
         for documents in document:
             request_data = {
@@ -48,15 +126,21 @@ def users_information():
                 "firstname": documents[3],
                 "timestamp_creation": documents[5],
                 "last_modified_date": documents[6],
-                "profile_picture": get_encoded_file(documents[4], "PFP_UPLOAD_FOLDER"),
+                "profile_picture": get_pfp_url(documents[4]),
                 "role": documents[1],
             }
 
             result.append(request_data)
+        if document:
+            total_count = document[0][7]
+        elif params["offset"]:
+            # the page is past the last one, the users are counted without it
+            count_query = f"SELECT COUNT(*) FROM uniride.ur_user {where}"
+            total_count = connect_pg.get_query(conn, count_query, params)[0][0]
     finally:
         connect_pg.disconnect(conn)
 
-    return result
+    return result, total_count
 
 
 def verify_user(id_user) -> None:
@@ -94,6 +178,8 @@ def delete_user(id_user) -> int:
     delete_values = (id_user,)
     connect_pg.execute_command(conn, delete_query, delete_values)
     connect_pg.disconnect(conn)
+    user_cache.invalidate_user(id_user)
+    bump_token_version(id_user)
 
     return id_user
 
@@ -133,65 +219,75 @@ def user_information_id(id_user):
     return result
 
 
-def user_stat_passenger(id_user):
-    """Get user information"""
-    with connect_pg.connect() as conn:
-        verify_user(id_user)
-
-        query = """
-        SELECT j_accepted
-        FROM uniride.ur_join
-        WHERE u_id = %s
-        """
-        document = connect_pg.get_query(conn, query, (id_user,))
-
-    if not document:
-        # If the query result is None, return counts initialized to 0
-        return {"completed_count": 0, "pending_count": 0}
-
-    user_data = document[0]
-    count_completed = user_data.count(1)
-    count_pending = user_data.count(0)
-
-    result = {
-        "completed_count": count_completed,
-        "pending_count": count_pending,
+def users_statistics(user_ids):
+    """Get the trips statistics and the average rating of several users, with a single query
+    :return: the statistics by user id, users not found are missing
+    """
+    conn = connect_pg.connect()
+    query = """
+        SELECT u.u_id,
+               COALESCE(d.pending_count, 0), COALESCE(d.canceled_count, 0),
+               COALESCE(d.completed_count, 0), COALESCE(d.oncourse_count, 0),
+               COALESCE(p.completed_count, 0), COALESCE(p.pending_count, 0),
+               ROUND(rs.rs_sum / NULLIF(rs.rs_count, 0), 2)
+        FROM uniride.ur_user u
+        LEFT JOIN (
+            SELECT t_user_id AS u_id,
+                   COUNT(*) FILTER (WHERE t_status = %(pending)s) AS pending_count,
+                   COUNT(*) FILTER (WHERE t_status = %(canceled)s) AS canceled_count,
+                   COUNT(*) FILTER (WHERE t_status = %(completed)s) AS completed_count,
+                   COUNT(*) FILTER (WHERE t_status = %(oncourse)s) AS oncourse_count
+            FROM uniride.ur_trip
+            WHERE t_user_id = ANY(%(user_ids)s::integer[])
+            GROUP BY t_user_id
+        ) d USING (u_id)
+        LEFT JOIN (
+            SELECT u_id,
+                   COUNT(*) FILTER (WHERE j_accepted = 1) AS completed_count,
+                   COUNT(*) FILTER (WHERE j_accepted = 0) AS pending_count
+            FROM uniride.ur_join
+            WHERE u_id = ANY(%(user_ids)s::integer[])
+            GROUP BY u_id
+        ) p USING (u_id)
+        LEFT JOIN uniride.ur_rating_summary rs USING (u_id)
+        WHERE u.u_id = ANY(%(user_ids)s::integer[])
+    """
+    params = {
+        "user_ids": list(user_ids),
+        "pending": TripStatus.PENDING.value,
+        "canceled": TripStatus.CANCELED.value,
+        "completed": TripStatus.COMPLETED.value,
+        "oncourse": TripStatus.ONCOURSE.value,
     }
+    try:
+        rows = connect_pg.get_query(conn, query, params) or []
+    finally:
+        connect_pg.disconnect(conn)
 
-    return result
-
-
-def user_stat_driver(id_user):
-    """Get user information"""
-    with connect_pg.connect() as conn:
-        verify_user(id_user)
-
-        query = """
-        SELECT t_status
-        FROM uniride.ur_trip
-        WHERE t_user_id = %s
-        """
-        document = connect_pg.get_query(conn, query, (id_user,))
-
-    if not document:
-        # If the query result is None, return counts initialized to 0
-        return {"pending_count": 0, "canceled_count": 0, "completed_count": 0, "oncourse_count": 0}
-
-    user_data = document[0]
-
-    countpending = user_data.count(1)
-    countcanceled = user_data.count(2)
-    countcompleted = user_data.count(3)
-    countoncourse = user_data.count(4)
-
-    result = {
-        "pending_count": countpending,
-        "canceled_count": countcanceled,
-        "completed_count": countcompleted,
-        "oncourse_count": countoncourse,
+    return {
+        row[0]: {
+            "driver_trip": {
+                "pending_count": row[1],
+                "canceled_count": row[2],
+                "completed_count": row[3],
+                "oncourse_count": row[4],
+            },
+            "passenger_trip": {
+                "completed_count": row[5],
+                "pending_count": row[6],
+            },
+            "average_rating": row[7],
+        }
+        for row in rows
     }
 
-    return result
+
+def user_statistics(id_user):
+    """Get the trips statistics and the average rating of a user"""
+    statistics = users_statistics([id_user])
+    if not statistics:
+        raise UserNotFoundException()
+    return next(iter(statistics.values()))
 
 
 def verify_rating_criteria(id_criteria) -> None:
@@ -291,111 +387,65 @@ def update_rating_criteria(data):
     return {"message": "Rating criteria updated successfully"}
 
 
-def users_ranking(role):
-    """Get ranking information"""
+def users_ranking(role, page=1, page_size=10):
+    """Get the ranking of the users of a role, by average rating
+    :return: the users of the page and the total number of ranked users
+    """
     conn = connect_pg.connect()
     result = []
+    total_count = 0
 
     try:
         query = """
-            SELECT DISTINCT ON (ur_user.u_id) ur_user.u_id, ur_user.r_id, ur_user.u_lastname, ur_user.u_firstname,ur_user.u_profile_picture,
-                   ur_rating.rc_id, AVG(ur_rating.n_value) AS n_value
-            FROM uniride.ur_user
-            NATURAL JOIN uniride.ur_rating
-            WHERE ur_user.r_id = %s  
-            GROUP BY ur_user.u_id, ur_user.r_id, ur_user.u_lastname, ur_user.u_firstname, ur_rating.rc_id
+            WITH ranked_user AS (
+                SELECT u.u_id, u.r_id, u.u_lastname, u.u_firstname, u.u_profile_picture,
+                       ROUND(rs.rs_sum / rs.rs_count, 2) AS average,
+                       RANK() OVER (ORDER BY rs.rs_sum / rs.rs_count DESC) AS rank,
+                       COUNT(*) OVER () AS total_count
+                FROM uniride.ur_rating_summary rs
+                JOIN uniride.ur_user u USING (u_id)
+                WHERE u.r_id = %(role)s AND rs.rs_count > 0
+                ORDER BY rank, u.u_id
+                LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT ru.u_id, ru.r_id, ru.u_lastname, ru.u_firstname, ru.u_profile_picture, ru.average, ru.rank,
+                   ru.total_count,
+                   COALESCE(
+                       json_agg(
+                           json_build_object(
+                               'id', rc.rc_id,
+                               'name', rc.rc_name,
+                               'value', ROUND(rcs.rcs_sum / NULLIF(rcs.rcs_count, 0), 2)::text
+                           )
+                           ORDER BY rc.rc_id
+                       ) FILTER (WHERE rc.rc_id IS NOT NULL),
+                       '[]'
+                   ) AS score_criteria
+            FROM ranked_user ru
+            LEFT JOIN uniride.ur_rating_criteria rc ON rc.r_id = ru.r_id
+            LEFT JOIN uniride.ur_rating_criteria_summary rcs ON rcs.u_id = ru.u_id AND rcs.rc_id = rc.rc_id
+            GROUP BY ru.u_id, ru.r_id, ru.u_lastname, ru.u_firstname, ru.u_profile_picture, ru.average, ru.rank,
+                     ru.total_count
+            ORDER BY ru.rank, ru.u_id
         """
-        ranks = connect_pg.get_query(conn, query, (role,))
+        params = {"role": role, "limit": page_size, "offset": (page - 1) * page_size}
+        ranks = connect_pg.get_query(conn, query, params)
 
         for rank in ranks:
             user_data = {
                 "id": rank[0],
-                "profile_picture": get_encoded_file(rank[4], "PFP_UPLOAD_FOLDER"),
+                "profile_picture": get_pfp_url(rank[4]),
                 "firstname": rank[3],
                 "lastname": rank[2],
                 "role": rank[1],
             }
-
-            score_criteria = criteria_by_id(rank[0], rank[1])
-            average = calculate_avg_note_by_user(rank[0])
-            result.append({"user": user_data, "average": average, "scoreCriteria": score_criteria})
+            result.append({"user": user_data, "average": rank[5], "rank": rank[6], "scoreCriteria": rank[8]})
+        if ranks:
+            total_count = ranks[0][7]
     finally:
         connect_pg.disconnect(conn)
 
-    return result
-
-
-def calculate_avg_note_by_user(user_id) -> float:
-    """Calculate the average note value for a given user."""
-    conn = connect_pg.connect()
-
-    try:
-        query = """
-            SELECT AVG(n_value) AS avg_note
-            FROM uniride.ur_rating
-            WHERE u_id = %s
-        """
-        avg_result = connect_pg.get_query(conn, query, (user_id,))
-
-        if avg_result and avg_result[0][0] is not None:
-            return round(avg_result[0][0], 2)
-        return None  # Return None if there are no notes for the user
-
-    finally:
-        connect_pg.disconnect(conn)
-
-
-def criteria_by_id(user_id, role):
-    """Get criteria by id"""
-    conn = connect_pg.connect()
-    result = []
-
-    try:
-        query = """
-            SELECT rc_id, ROUND(avg(n_value),2) as avg_value, rc_name
-            FROM uniride.ur_rating
-            NATURAL JOIN uniride.ur_rating_criteria
-            WHERE ur_rating.u_id = %s and ur_rating_criteria.r_id = %s
-            GROUP BY rc_id, rc_name
-        """
-        criterian_result = connect_pg.get_query(
-            conn,
-            query,
-            (
-                user_id,
-                role,
-            ),
-        )
-
-        actif_criterion = actif_criteria(role)
-
-        print(actif_criterion, "ACTIF CRITERION")
-
-        for actif in actif_criterion:
-            criteria_found = False
-            for criteria in criterian_result:
-                if actif["id"] == criteria[0]:
-                    user_data = {
-                        "id": criteria[0],
-                        "name": criteria[2],
-                        "value": criteria[1],
-                    }
-                    result.append(user_data)
-                    criteria_found = True
-                    break
-
-            if not criteria_found:
-                # If no matching criteria found, add null values
-                user_data = {
-                    "id": actif["id"],
-                    "name": actif["name"],
-                    "value": None,
-                }
-                result.append(user_data)
-
-        return result
-    finally:
-        connect_pg.disconnect(conn)
+    return result, total_count
 
 
 def actif_criteria(role):
@@ -436,7 +486,98 @@ def count_role(role) -> int:
 def average_rating_user_id(id_user) -> float:
     """Get average rating"""
     conn = connect_pg.connect()
-    query = "SELECT ROUND(avg(n_value),2) FROM uniride.ur_rating WHERE u_id = %s"
+    query = """
+        SELECT ROUND(rs_sum / NULLIF(rs_count, 0), 2)
+        FROM uniride.ur_rating_summary
+        WHERE u_id = %s
+    """
     result = connect_pg.get_query(conn, query, (id_user,))
     connect_pg.disconnect(conn)
-    return result[0][0]
+    return result[0][0] if result else None
+
+
+def _iter_export(query):
+    """Iterate the rows of an export query with a server-side cursor, the connection is closed at the end"""
+    conn = connect_pg.connect()
+    try:
+        yield from connect_pg.iter_query(conn, query, return_dict=True)
+    finally:
+        connect_pg.disconnect(conn)
+
+
+_USERS_EXPORT_QUERY = """
+    SELECT u_id, u_login, u_firstname, u_lastname, u_student_email, u_gender, u_phone_number,
+           u_email_verified, r_id, u_timestamp_creation, u_timestamp_modification
+    FROM uniride.ur_user
+"""
+
+
+def export_users():
+    """Iterate all the users, without their password"""
+    return _iter_export(_USERS_EXPORT_QUERY + " ORDER BY u_id")
+
+
+def export_documents():
+    """Iterate the documents of all the users, with their verification status"""
+    query = """
+        SELECT u_id, u_lastname, u_firstname, d_license, d_id_card, d_school_certificate, d_insurance,
+               v_license_verified, v_id_card_verified, v_school_certificate_verified, v_insurance_verified,
+               d_timestamp_modification
+        FROM uniride.ur_documents
+        NATURAL JOIN uniride.ur_document_verification
+        NATURAL JOIN uniride.ur_user
+        ORDER BY u_id
+    """
+    return _iter_export(query)
+
+
+def export_ratings():
+    """Iterate all the ratings, with the name of their criteria"""
+    query = """
+        SELECT r.u_id, r.t_id, r.rc_id, rc.rc_name, r.n_value
+        FROM uniride.ur_rating r
+        JOIN uniride.ur_rating_criteria rc ON rc.rc_id = r.rc_id
+        ORDER BY r.t_id, r.u_id, r.rc_id
+    """
+    return _iter_export(query)
+
+
+# query and date column of the bulk exports, the ratings are dated by their trip
+BULK_EXPORTS = {
+    "trips": ("SELECT * FROM uniride.ur_trip", "t_timestamp_proposed"),
+    "bookings": ("SELECT * FROM uniride.ur_join", "j_date_requested"),
+    "ratings": (
+        "SELECT r.*, t.t_timestamp_proposed FROM uniride.ur_rating r JOIN uniride.ur_trip t ON t.t_id = r.t_id",
+        "t_timestamp_proposed",
+    ),
+    "users": (_USERS_EXPORT_QUERY, "u_timestamp_creation"),
+}
+
+
+def _iter_copy(query, params):
+    """Iterate the CSV of an export query made with COPY, the connection is closed at the end"""
+    conn = connect_pg.connect()
+    try:
+        yield from connect_pg.iter_copy(conn, query, params)
+    finally:
+        connect_pg.disconnect(conn)
+
+
+def bulk_export(name, date_from=None, date_to=None):
+    """Iterate the CSV of a table made with COPY, much faster than fetching its rows
+    :param name: "trips", "bookings", "ratings" or "users"
+    :param date_from: first day of the export, included
+    :param date_to: last day of the export, included
+    """
+    if name not in BULK_EXPORTS:
+        raise InvalidInputException("INVALID_EXPORT")
+    query, date_column = BULK_EXPORTS[name]
+
+    conditions = []
+    if date_from:
+        conditions.append(f"{date_column} >= %(date_from)s")
+    if date_to:
+        conditions.append(f"{date_column} < %(date_to)s::date + 1")
+    if conditions:
+        query = f"SELECT * FROM ({query}) AS export WHERE " + " AND ".join(conditions)
+    return _iter_copy(query, {"date_from": date_from, "date_to": date_to})
@@ -1,11 +1,12 @@
 """Documents service module"""
-import os
 from datetime import datetime
-from uniride_sme import app, connect_pg
+from uniride_sme import cache, connect_pg
 from uniride_sme.model.bo.documents_bo import DocumentsBO
-from uniride_sme.utils.file import save_file, delete_file, get_encoded_file
+from uniride_sme.utils.file import save_file, delete_file, get_encoded_file, get_pfp_url
+from uniride_sme.utils import user_cache
+from uniride_sme.utils.jwt_token import bump_token_version
 from uniride_sme.service import user_service, admin_service
-from uniride_sme.utils.exception.exceptions import MissingInputException
+from uniride_sme.utils.exception.exceptions import MissingInputException, InvalidInputException
 from uniride_sme.utils.exception.documents_exceptions import DocumentsNotFoundException, DocumentsTypeException
 
 
@@ -29,48 +30,36 @@ def get_documents_by_user_id(user_id) -> DocumentsBO:
     return document_bo
 
 
-def add_documents(user_id, files) -> None:
-    """Insert documents in the database"""
+DOCUMENT_TYPES = ("license", "id_card", "school_certificate", "insurance")
+DOCUMENTS_ALLOWED_EXTENSIONS = ["pdf", "png", "jpg", "jpeg"]
+
+
+def add_documents(user_id, files, conn) -> list:
+    """Insert the documents of a new user, in the transaction of its registration
+    :return: the saved files, as (file name, location)
+    """
     if not user_id:
         raise MissingInputException("USER_ID_MISSING")
 
-    conn = connect_pg.connect()
-    admin_service.verify_user(user_id)
+    documents = {}
+    for document_type in DOCUMENT_TYPES:
+        file = files.get(document_type, None)
+        if file and file.filename != "":
+            location = f"{document_type.upper()}_UPLOAD_FOLDER"
+            documents[document_type] = (save_file(file, location, DOCUMENTS_ALLOWED_EXTENSIONS, user_id), location)
 
-    query = """
+    documents_columns = "".join(f", d_{document_type}" for document_type in documents)
+    verification_columns = "".join(f", v_{document_type}_verified" for document_type in documents)
+    query = f"""
     WITH first_insert AS (
-        INSERT INTO uniride.ur_documents (u_id) VALUES (%s)
+        INSERT INTO uniride.ur_documents (u_id{documents_columns}) VALUES (%s{", %s" * len(documents)})
     )
-    INSERT INTO uniride.ur_document_verification (u_id) VALUES (%s);
+    INSERT INTO uniride.ur_document_verification (u_id{verification_columns}) VALUES (%s{", 0" * len(documents)});
     """
-    connect_pg.execute_command(conn, query, (user_id, user_id))
-    connect_pg.disconnect(conn)
-    try:
-        save_license(user_id, files.get("license", None))
-    except MissingInputException:
-        pass
-    try:
-        save_id_card(user_id, files.get("id_card", None))
-    except MissingInputException:
-        pass
-
-    try:
-        save_school_certificate(user_id, files.get("school_certificate", None))
-    except MissingInputException:
-        pass
-
-    try:
-        save_insurance(user_id, files.get("insurance", None))
-    except MissingInputException:
-        pass
-
-    try:
-        save_license(user_id, files.get("license", None))
-        save_id_card(user_id, files.get("id_card", None))
-        save_school_certificate(user_id, files.get("school_certificate", None))
-        save_insurance(user_id, files.get("insurance", None))
-    except MissingInputException:
-        pass
+    params = (user_id, *(file_name for file_name, _ in documents.values()), user_id)
+    connect_pg.execute_command(conn, query, params, commit=False)
+    cache.delete_memoized(document_number_status)
+    return list(documents.values())
 
 
 def save_license(user_id, file, old_file_name=None) -> None:
@@ -100,13 +89,12 @@ def _save_document(user_id, file, old_file_name, document_type) -> None:
     if file.filename == "":
         raise MissingInputException(f"MISSING_{document_type.upper()}_FILE")
 
-    allowed_extensions = ["pdf", "png", "jpg", "jpeg"]
-    directory = app.config[f"{document_type.upper()}_UPLOAD_FOLDER"]
-    file_name = save_file(file, directory, allowed_extensions, user_id)
+    location = f"{document_type.upper()}_UPLOAD_FOLDER"
+    file_name = save_file(file, location, DOCUMENTS_ALLOWED_EXTENSIONS, user_id)
 
     if old_file_name and file_name != old_file_name:
         try:
-            delete_file(old_file_name, directory)
+            delete_file(old_file_name, location)
         except FileNotFoundError:
             pass
 
@@ -125,113 +113,97 @@ def _save_document(user_id, file, old_file_name, document_type) -> None:
         values = (file_name, user_id, user_id)
         connect_pg.execute_command(conn, query, values)
         connect_pg.disconnect(conn)
+        cache.delete_memoized(document_number_status)
 
     return file_name
 
 
-def document_to_verify():
-    """Get documents to verify"""
+def document_to_verify(after=None, after_id=None, limit=10):
+    """Get documents to verify, the oldest modified first
+    :param after: modification date of the last request of the previous page, isoformat
+    :param after_id: user id of the last request of the previous page
+    :return: the requests and the cursor of the next page, None if it is the last page
+    """
+    if after is not None:
+        try:
+            after = datetime.fromisoformat(after)
+            after_id = int(after_id)
+        except (TypeError, ValueError) as e:
+            raise InvalidInputException("INVALID_CURSOR") from e
+    if limit < 1:
+        raise InvalidInputException("INVALID_LIMIT")
+
     conn = connect_pg.connect()
     query = """
-        SELECT u_id, v_id, u_lastname, u_firstname, u_profile_picture, d_timestamp_modification,v_license_verified, v_id_card_verified,v_school_certificate_verified, v_insurance_verified
+        SELECT u_id, v_id, u_lastname, u_firstname, u_profile_picture, d_timestamp_modification,
+               ((v_license_verified IN (0, -1)) IS TRUE)::int + ((v_id_card_verified IN (0, -1)) IS TRUE)::int
+               + ((v_school_certificate_verified IN (0, -1)) IS TRUE)::int
+               + ((v_insurance_verified IN (0, -1)) IS TRUE)::int
         FROM uniride.ur_document_verification
-        NATURAL JOIN uniride.ur_user
-        NATURAL JOIN uniride.ur_documents
-        WHERE u_id = u_id
+        JOIN uniride.ur_user USING (u_id)
+        JOIN uniride.ur_documents USING (u_id)
+        WHERE (v_license_verified IN (0, -1) OR v_id_card_verified IN (0, -1)
+               OR v_school_certificate_verified IN (0, -1) OR v_insurance_verified IN (0, -1))
+          AND (%(after)s::timestamp IS NULL OR (d_timestamp_modification, u_id) > (%(after)s, %(after_id)s))
+        ORDER BY d_timestamp_modification, u_id
+        LIMIT %(limit)s
     """
-    documents = connect_pg.get_query(conn, query)
-    connect_pg.disconnect(conn)
+    # one more row is fetched to know if there is a next page
+    params = {"after": after, "after_id": after_id, "limit": limit + 1}
+    try:
+        documents = connect_pg.get_query(conn, query, params)
+    finally:
+        connect_pg.disconnect(conn)
 
-    # Create a list to store documents with attributes
     result = []
+    for document in documents[:limit]:
+        request_data = {
+            "request_number": document[1],
+            "documents_to_verify": document[6],
+            "person": {
+                "id_user": document[0],
+                "first_name": document[2],
+                "last_name": document[3],
+                "last_modified_date": datetime.strftime(document[5], "%Y-%m-%d %H:%M:%S"),
+                "profile_picture": get_pfp_url(document[4]),
+            },
+        }
+        result.append(request_data)
 
-    for document in documents:
-        if count_zero_and_minus_one(document) > 0:
-            formatted_last_modified_date = datetime.strftime(document[5], "%Y-%m-%d %H:%M:%S")
-            profile_picture_url = get_encoded_file(document[4], "PFP_UPLOAD_FOLDER")
-            request_data = {
-                "request_number": document[1],
-                "documents_to_verify": count_zero_and_minus_one(document),
-                "person": {
-                    "id_user": document[0],
-                    "first_name": document[2],
-                    "last_name": document[3],
-                    "last_modified_date": formatted_last_modified_date,
-                    "profile_picture": profile_picture_url,
-                },
-            }
-
-            result.append(request_data)
-
-    return result
-
-
-def count_zero_and_minus_one(document):
-    """Count the number of zero and minus one in a document"""
-    fields_to_check = [str(document[i]) for i in range(6, 10)]
-
-    total_zeros = sum(field.count("0") for field in fields_to_check)
-    total_minus_ones = sum(field.count("-1") for field in fields_to_check)
-
-    return total_zeros + total_minus_ones
+    next_cursor = None
+    if len(documents) > limit:
+        last_document = documents[limit - 1]
+        next_cursor = {"after": last_document[5].isoformat(), "after_id": last_document[0]}
+    return result, next_cursor
 
 
+@cache.memoize()
 def document_number_status():
-    """Get documents to verify"""
+    """Get the number of documents by status, with a single query"""
     conn = connect_pg.connect()
     query = """
-        SELECT v_license_verified, v_id_card_verified, v_school_certificate_verified, v_insurance_verified
+        SELECT COUNT(*) FILTER (WHERE v_license_verified = 1) + COUNT(*) FILTER (WHERE v_id_card_verified = 1)
+               + COUNT(*) FILTER (WHERE v_school_certificate_verified = 1)
+               + COUNT(*) FILTER (WHERE v_insurance_verified = 1),
+               COUNT(*) FILTER (WHERE v_license_verified = 0) + COUNT(*) FILTER (WHERE v_id_card_verified = 0)
+               + COUNT(*) FILTER (WHERE v_school_certificate_verified = 0)
+               + COUNT(*) FILTER (WHERE v_insurance_verified = 0),
+               COUNT(*) FILTER (WHERE v_license_verified = -1) + COUNT(*) FILTER (WHERE v_id_card_verified = -1)
+               + COUNT(*) FILTER (WHERE v_school_certificate_verified = -1)
+               + COUNT(*) FILTER (WHERE v_insurance_verified = -1)
         FROM uniride.ur_document_verification
-        """
-    documents = connect_pg.get_query(conn, query)
-    connect_pg.disconnect(conn)
-
-    # Initialize counts for total across all attributes
-    total_document_pending = 0
-    total_document_ok = 0
-    total_document_refused = 0
-
-    if not documents:
-        # If the query result is None, return counts initialized to 0
-        return {
-            "document_validated": 0,
-            "document_pending": 0,
-            "document_refused": 0,
-        }
-
-    attributes = ["v_license_verified", "v_id_card_verified", "v_school_certificate_verified", "v_insurance_verified"]
-
-    for document in documents:
-        for attribute in attributes:
-            attribute_value = document[attributes.index(attribute)]
-
-            # Update counts for each attribute
-            total_document_pending += 1 if attribute_value == 0 else 0
-            total_document_ok += 1 if attribute_value == 1 else 0
-            total_document_refused += 1 if attribute_value == -1 else 0
-
-    # Create a dictionary to store total counts
-    result = {
-        "document_validated": total_document_ok,
-        "document_pending": total_document_pending,
-        "document_refused": total_document_refused,
-    }
-
-    return result
-
-
-def count_documents_status(document):
-    """Count documents by status"""
-    fields_to_check = [str(document[i]) for i in range(0, 4)]
+    """
+    try:
+        counts = connect_pg.get_query(conn, query)[0]
+    finally:
+        connect_pg.disconnect(conn)
 
-    counts = {
-        "document_pending": sum(field.count("0") for field in fields_to_check),
-        "document_validated": sum(field.count("1") for field in fields_to_check),
-        "document_refused": sum(field.count("-1") for field in fields_to_check),
+    return {
+        "document_validated": counts[0],
+        "document_pending": counts[1],
+        "document_refused": counts[2],
     }
 
-    return counts
-
 
 def document_check(data):
     """Update document status"""
@@ -283,6 +255,7 @@ def document_check(data):
         connect_pg.execute_command(conn, query, (status, user_id))
 
     connect_pg.disconnect(conn)
+    cache.delete_memoized(document_number_status)
 
     update_role(user_id, status_column)
 
@@ -292,7 +265,8 @@ def document_check(data):
 def update_role(user_id, column=None) -> None:
     """Update r_id to 1 if both v_license_verified and v_id_card_verified are 1"""
 
-    user_bo = user_service.get_user_by_id(user_id)
+    # read from db, the cached user may be stale in the other processes
+    user_bo = user_service.get_user_by_id(user_id, use_cache=False)
 
     conn = connect_pg.connect()
     query = """
@@ -335,14 +309,16 @@ def update_role(user_id, column=None) -> None:
     connect_pg.execute_command(conn, r_id_query, (user_id,))
 
     connect_pg.disconnect(conn)
+    user_cache.invalidate_user(user_id)
+    bump_token_version(user_id)
 
 
 def delete_documents(documents, folder_documents, id_doc) -> None:
     """Delete documents if they are verified"""
-    if os.path.exists(os.path.join(app.config[folder_documents], documents[0].get(id_doc))):
-        os.remove(os.path.join(app.config[folder_documents], documents[0].get(id_doc)))
-    else:
-        raise MissingInputException("MISSING_DOCUMENTS_FOLDER")
+    try:
+        delete_file(documents[0].get(id_doc), folder_documents)
+    except FileNotFoundError as e:
+        raise MissingInputException("MISSING_DOCUMENTS_FOLDER") from e
 
 
 def document_user(user_id):
@@ -29,6 +29,7 @@ from uniride_sme.utils.exception.trip_exceptions import (
 )
 from uniride_sme.utils.trip_status import TripStatus
 from uniride_sme.utils.maths_formulas import haversine
+from uniride_sme.utils.cartography.route_checker_factory import get_route_checker
 from uniride_sme.utils.file import get_encoded_file
 
 
@@ -154,7 +155,7 @@ def calculate_price(trip: TripBO) -> None:
 
     origin = (trip.departure_address.latitude, trip.departure_address.longitude)
     destination = (trip.arrival_address.latitude, trip.arrival_address.longitude)
-    distance = trip.route_checker.get_distance(origin, destination)
+    distance = get_route_checker().get_distance(origin, destination)
 
     rate_per_km = app.config["RATE_PER_KM"]
     cost_per_km = app.config["COST_PER_KM"]
@@ -282,48 +283,36 @@ def get_trips_for_university_address(
 
     available_trips: List[TripDTO] = []
 
+    # the DTOs are built from the rows, without intermediate business objects
     for trip in trips:
-        trip_bo = format_trip(trip)
-        trip_bo.price = trip_bo.price * trip_bo.total_passenger_count
-
         if intermediate_point_departure == university_point:
             distance = haversine(
                 address_arrival_bo.latitude,
                 address_arrival_bo.longitude,
-                trip_bo.arrival_address.latitude,
-                trip_bo.arrival_address.longitude,
+                trip["arrival_a_latitude"],
+                trip["arrival_a_longitude"],
             )
         else:
             distance = haversine(
                 departure_address_bo.latitude,
                 departure_address_bo.longitude,
-                trip_bo.departure_address.latitude,
-                trip_bo.departure_address.longitude,
+                trip["departure_a_latitude"],
+                trip["departure_a_longitude"],
             )
 
         address_dtos = {
-            "departure": AddressDTO(
-                id=trip_bo.departure_address.id,
-                latitude=trip_bo.departure_address.latitude,
-                longitude=trip_bo.departure_address.longitude,
-                address_name=trip_bo.departure_address.get_full_address(),
-            ),
-            "arrival": AddressDTO(
-                id=trip_bo.arrival_address.id,
-                latitude=trip_bo.arrival_address.latitude,
-                longitude=trip_bo.arrival_address.longitude,
-                address_name=trip_bo.arrival_address.get_full_address(),
-            ),
+            "departure": format_address_dto(trip, "departure_"),
+            "arrival": format_address_dto(trip, "arrival_"),
             "distance": distance,
         }
 
         trip_dto = TripDTO(
-            trip_id=trip_bo.id,
+            trip_id=trip["t_id"],
             address=address_dtos,
-            driver_id=trip_bo.user_id,
-            price=trip_bo.price,
-            proposed_date=str(trip_bo.timestamp_proposed),
-            total_passenger_count=trip_bo.total_passenger_count,
+            driver_id=trip["t_user_id"],
+            price=trip["t_price"] * trip["t_total_passenger_count"],
+            proposed_date=str(trip["t_timestamp_proposed"]),
+            total_passenger_count=trip["t_total_passenger_count"],
         )
         available_trips.append(trip_dto)
 
@@ -378,31 +367,51 @@ def format_get_current_driver_trips(driver_current_trips):
     available_trips = []
 
     for current_trip in driver_current_trips:
-        trip_bo = format_trip(current_trip)
-
         address_dtos = {
             "departure": AddressSimpleDTO(
-                id=trip_bo.departure_address.id,
-                name=trip_bo.departure_address.get_full_address(),
+                id=current_trip["departure_a_id"],
+                name=format_full_address(current_trip, "departure_"),
             ),
             "arrival": AddressSimpleDTO(
-                id=trip_bo.arrival_address.id,
-                name=trip_bo.arrival_address.get_full_address(),
+                id=current_trip["arrival_a_id"],
+                name=format_full_address(current_trip, "arrival_"),
             ),
         }
         trip_dto = TripDTO(
-            trip_id=trip_bo.id,
-            status=trip_bo.status,
+            trip_id=current_trip["t_id"],
+            status=current_trip.get("t_status", None),
             address=address_dtos,
-            driver_id=trip_bo.user_id,
-            proposed_date=str(trip_bo.timestamp_proposed),
-            price=trip_bo.price,
+            driver_id=current_trip["t_user_id"],
+            proposed_date=str(current_trip["t_timestamp_proposed"]),
+            price=current_trip["t_price"],
         )
         available_trips.append(trip_dto)
 
     return available_trips
 
 
+def format_full_address(raw_trip: dict, prefix: str) -> str:
+    """Format the full address of a trip row, like AddressBO.get_full_address
+    :param prefix: "departure_" or "arrival_"
+    """
+    return (
+        f"{raw_trip[prefix + 'a_street_number']} {raw_trip[prefix + 'a_street_name']}, "
+        f"{raw_trip[prefix + 'a_city']}, {raw_trip[prefix + 'a_postal_code']}"
+    )
+
+
+def format_address_dto(raw_trip: dict, prefix: str) -> AddressDTO:
+    """Format the address DTO of a trip row
+    :param prefix: "departure_" or "arrival_"
+    """
+    return AddressDTO(
+        id=raw_trip[prefix + "a_id"],
+        latitude=raw_trip[prefix + "a_latitude"],
+        longitude=raw_trip[prefix + "a_longitude"],
+        address_name=format_full_address(raw_trip, prefix),
+    )
+
+
 def format_trip(raw_trip: dict) -> TripBO:
     """Format the trip"""
     departure_address = AddressBO(
@@ -566,7 +575,7 @@ def get_trip_by_id(trip_id) -> TripDetailedDTO:
     trip_bo = format_trip(trip)
     origin = (trip_bo.departure_address.latitude, trip_bo.departure_address.longitude)
     destination = (trip_bo.arrival_address.latitude, trip_bo.arrival_address.longitude)
-    duration = trip_bo.route_checker.get_duration(origin, destination, trip_bo.timestamp_proposed)
+    duration = get_route_checker().get_duration(origin, destination, trip_bo.timestamp_proposed)
     arrival_date = trip_bo.timestamp_proposed + timedelta(seconds=duration)
     address_dtos = {
         "departure": AddressDTO(
@@ -704,15 +713,6 @@ def get_passengers_emails(trip_id) -> List[PassengerEmailsDTO]:
     return passenger_dtos
 
 
-def trips_status(status) -> int:
-    """Get number status of trip"""
-    conn = connect_pg.connect()
-    query = "SELECT COUNT(*) FROM uniride.ur_trip WHERE t_status = %s"
-    result = connect_pg.get_query(conn, query, (status,))
-    connect_pg.disconnect(conn)
-    return result[0][0]
-
-
 def _validate_driver_id(driver_id, user_id) -> None:
     if not user_id:
         raise MissingInputException("USER_ID_MISSING")
@@ -839,10 +839,14 @@ def rate_user(value_rating, trip_id, rating_criteria_id) -> None:
     validate_rating(trip_id, rating_criteria_id)
     validate_value_rating(value_rating)
     conn = connect_pg.connect()
-    query_trip_user_id = "SELECT t_user_id FROM uniride.ur_trip WHERE t_id = %s"
-    user_id_trip = connect_pg.get_query(conn, query_trip_user_id, (trip_id,))
-    query = "INSERT INTO uniride.ur_rating( n_value, u_id, t_id, rc_id) VALUES (%s, %s, %s, %s)"
-    connect_pg.execute_command(conn, query, (value_rating, user_id_trip[0][0], trip_id, rating_criteria_id))
+    # the rating summaries of the user are updated by the ur_rating_summary_trigger trigger
+    query = """
+        INSERT INTO uniride.ur_rating (n_value, u_id, t_id, rc_id)
+        SELECT %s, t_user_id, t_id, %s
+        FROM uniride.ur_trip
+        WHERE t_id = %s
+    """
+    connect_pg.execute_command(conn, query, (value_rating, rating_criteria_id, trip_id))
     connect_pg.disconnect(conn)
 
 
@@ -1,13 +1,15 @@
 """User service module"""
+import dataclasses
 import re
-import bcrypt
+import psycopg2
 from uniride_sme import app, connect_pg
 from uniride_sme.model.bo.user_bo import UserBO
-from uniride_sme.service.documents_service import update_role
+from uniride_sme.service.documents_service import update_role, add_documents
 from uniride_sme.service.trip_service import get_trip_by_id
-from uniride_sme.service import admin_service
 from uniride_sme.utils.file import save_file, delete_file
+from uniride_sme.utils import user_cache, password as password_utils
 from uniride_sme.utils.exception.exceptions import (
+    ApiException,
     InvalidInputException,
     MissingInputException,
 )
@@ -18,6 +20,21 @@ from uniride_sme.utils.exception.user_exceptions import (
 )
 
 
+PFP_ALLOWED_EXTENSIONS = ["png", "jpg", "jpeg"]
+TAKEN_MESSAGES = {
+    "u_login": "LOGIN_TAKEN",
+    "u_student_email": "EMAIL_TAKEN",
+    "u_phone_number": "PHONE_NUMBER_TAKEN",
+}
+
+# the student email is unique whatever its case
+TAKEN_CONDITIONS = {
+    "u_login": "u_login = %s",
+    "u_student_email": "lower(u_student_email) = lower(%s)",
+    "u_phone_number": "u_phone_number = %s",
+}
+
+
 def authenticate(login, password) -> UserBO:
     """authenticate the user"""
     # check if exist
@@ -26,55 +43,62 @@ def authenticate(login, password) -> UserBO:
     if not password:
         raise MissingInputException("PASSWORD_MISSING")
 
-    try:
-        user_bo = get_user_by_login(login)
-    except UserNotFoundException:
-        user_bo = get_user_by_email(login)
+    user_bo = get_user_by_login_or_email(login, with_password=True)
     _verify_password(password, user_bo.password)
+    _rehash_password_if_needed(user_bo.id, password, user_bo.password)
     return user_bo
 
 
-def get_user_role(user_id):
-    """Get user role"""
-    with connect_pg.connect() as conn:
-        admin_service.verify_user(user_id)
-
-        query = """
-        SELECT r_id, u_id
-        FROM uniride.ur_user
-        WHERE u_id = %s
-        """
-
-        r_id = connect_pg.get_query(conn, query, (user_id,))
+def get_user_by_id(user_id, with_password=False, use_cache=True) -> UserBO:
+    """Get user infos from db using the id
+    :param use_cache: False to read the user from db, when its cached infos may be stale
+    """
+    return _get_user_by_identifier(user_id, "u_id", with_password, use_cache)
 
-    if not r_id:
-        raise UserNotFoundException
 
-    document = r_id[0]
+def get_user_by_login(login, with_password=False) -> UserBO:
+    """Get user infos from db using the login"""
+    return _get_user_by_identifier(login, "u_login", with_password)
 
-    return {"role": document[0], "id": user_id}
 
+def get_user_by_email(student_email, with_password=False) -> UserBO:
+    """Get user infos from db using the student_email"""
+    return _get_user_by_identifier(student_email, "u_student_email", with_password)
 
-def get_user_by_id(user_id) -> UserBO:
-    """Get user infos from db using the id"""
-    return _get_user_by_identifier(user_id, "u_id")
 
+def get_user_by_login_or_email(identifier, with_password=False) -> UserBO:
+    """Get user infos from db using the login or the student_email, the email is case insensitive"""
+    if not with_password:
+        user_bo = user_cache.get_user(identifier, "u_login") or user_cache.get_user(identifier, "u_student_email")
+        if user_bo:
+            return user_bo
 
-def get_user_by_login(login) -> UserBO:
-    """Get user infos from db using the login"""
-    return _get_user_by_identifier(login, "u_login")
-
+    # a login can't contain "@", so at most one user matches
+    query = "SELECT * FROM uniride.ur_user WHERE u_login = %s OR lower(u_student_email) = lower(%s)"
+    conn = connect_pg.connect()
+    infos = connect_pg.get_query(conn, query, (identifier, identifier), True)
+    connect_pg.disconnect(conn)
 
-def get_user_by_email(student_email) -> UserBO:
-    """Get user infos from db using the student_email"""
-    return _get_user_by_identifier(student_email, "u_student_email")
+    if not infos:
+        raise UserNotFoundException()
+    user_bo = _get_user_bo(infos[0])
+    user_cache.set_user(user_bo)
+    return _without_password(user_bo, with_password)
 
 
-def _get_user_by_identifier(identifier, identifier_type) -> UserBO:
-    """Get user infos from db"""
+def _get_user_by_identifier(identifier, identifier_type, with_password=False, use_cache=True) -> UserBO:
+    """Get user infos from the cache, or from db if it isn't cached
+    :param with_password: the password is never cached, so the user is read from db when it is needed
+    :param use_cache: False to read the user from db, the cache is then refreshed with it
+    """
     if not identifier and not identifier_type:
         raise MissingInputException("IDENTIFIER_MISSING")
 
+    if use_cache and not with_password:
+        user_bo = user_cache.get_user(identifier, identifier_type)
+        if user_bo:
+            return user_bo
+
     query = f"select * from uniride.ur_user where {identifier_type} = %s"
     params = (identifier,)
 
@@ -84,9 +108,19 @@ def _get_user_by_identifier(identifier, identifier_type) -> UserBO:
 
     if not infos:
         raise UserNotFoundException()
-    infos = infos[0]
+    user_bo = _get_user_bo(infos[0])
+    user_cache.set_user(user_bo)
+    return _without_password(user_bo, with_password)
+
 
-    user_bo = UserBO(
+def _without_password(user_bo, with_password) -> UserBO:
+    """Remove the password of a user read from db, so it is the same as a cached user"""
+    return user_bo if with_password else dataclasses.replace(user_bo, password=None)
+
+
+def _get_user_bo(infos) -> UserBO:
+    """Get the user business object of a row of ur_user"""
+    return UserBO(
         id=infos["u_id"],
         login=infos["u_login"],
         firstname=infos["u_firstname"],
@@ -102,7 +136,6 @@ def _get_user_by_identifier(identifier, identifier_type) -> UserBO:
         email_verified=infos["u_email_verified"],
         r_id=infos["r_id"],
     )
-    return user_bo
 
 
 def add_user(  # pylint: disable=too-many-arguments, too-many-locals
@@ -116,17 +149,19 @@ def add_user(  # pylint: disable=too-many-arguments, too-many-locals
     phone_number,
     description,
     pfp_file,
+    document_files=None,
 ) -> UserBO:
-    """Insert the user in the database"""
+    """Insert the user and its documents in the database, in a single transaction"""
 
-    _validate_login(login)
-    _validate_student_email(student_email)
+    _validate_login(login, check_taken=False)
+    _validate_student_email(student_email, check_taken=False)
     _validate_firstname(firstname)
     _validate_lastname(lastname)
     _validate_gender(gender)
-    _validate_phone_number(phone_number)
+    _validate_phone_number(phone_number, check_taken=False)
     _validate_description(description)
     _validate_password(password, password_confirmation)
+    _validate_not_taken(login, student_email, phone_number)
 
     password = _hash_password(password)
 
@@ -148,17 +183,71 @@ def add_user(  # pylint: disable=too-many-arguments, too-many-locals
     query = f"INSERT INTO uniride.ur_user ({fields}) VALUES ({placeholders}) RETURNING u_id"
 
     conn = connect_pg.connect()
-    user_id = connect_pg.execute_command(conn, query, values)
-
+    saved_files = []
     try:
-        save_pfp(user_id, pfp_file)
-    except MissingInputException:
-        pass
+        # the unique constraints still apply to concurrent registrations
+        user_id = connect_pg.execute_command(conn, query, values, commit=False)
+
+        if pfp_file and pfp_file.filename != "":
+            file_name = save_file(pfp_file, "PFP_UPLOAD_FOLDER", PFP_ALLOWED_EXTENSIONS, user_id)
+            saved_files.append((file_name, "PFP_UPLOAD_FOLDER"))
+            query = "UPDATE uniride.ur_user SET u_profile_picture=%s WHERE u_id=%s"
+            connect_pg.execute_command(conn, query, (file_name, user_id), commit=False)
+
+        saved_files += add_documents(user_id, document_files or {}, conn)
+        conn.commit()
+    except (ApiException, psycopg2.Error) as e:
+        conn.rollback()
+        for file_name, location in saved_files:
+            try:
+                delete_file(file_name, location)
+            except FileNotFoundError:
+                pass
+        if isinstance(e, psycopg2.errors.UniqueViolation):
+            raise InvalidInputException(_get_taken_message(e)) from e
+        raise
+    finally:
+        connect_pg.disconnect(conn)
 
     return get_user_by_id(user_id)
 
 
-def _validate_login(login) -> None:
+def _validate_not_taken(login=None, student_email=None, phone_number=None, user_id=None) -> None:
+    """Check with one query that the login, the student email and the phone number aren't used
+    :param user_id: id of a user whose own values aren't considered taken
+    """
+    attributes = {"u_login": login, "u_student_email": student_email, "u_phone_number": phone_number}
+    attributes = {column: value for column, value in attributes.items() if value is not None}
+    other_user = " AND u_id <> %s" if user_id is not None else ""
+    query = "SELECT " + ", ".join(
+        f"EXISTS(SELECT 1 FROM uniride.ur_user WHERE {TAKEN_CONDITIONS[column]}{other_user})" for column in attributes
+    )
+    params = []
+    for value in attributes.values():
+        params += [value, user_id] if user_id is not None else [value]
+
+    conn = connect_pg.connect()
+    try:
+        taken = connect_pg.get_query(conn, query, tuple(params))[0]
+    finally:
+        connect_pg.disconnect(conn)
+
+    for column, is_taken in zip(attributes, taken):
+        if is_taken:
+            raise InvalidInputException(TAKEN_MESSAGES[column])
+
+
+def _get_taken_message(error) -> str:
+    """Get the message of a unique constraint violation, from the column in its detail"""
+    # the detail is like 'Key (u_login)=(jdoe) already exists.' or 'Key (lower(u_student_email))=(...) ...'
+    detail = error.diag.message_detail or ""
+    for column, message in TAKEN_MESSAGES.items():
+        if f"Key ({column})=" in detail or f"Key (lower({column}))=" in detail:
+            return message
+    return "USER_ALREADY_EXISTS"
+
+
+def _validate_login(login, check_taken=True) -> None:
     """Check if the login is valid"""
     # check if exist
     if not login:
@@ -173,14 +262,11 @@ def _validate_login(login) -> None:
         raise InvalidInputException("LOGIN_INVALID_CHARACTERS")
 
     # check if the login is already taken
-    query = "select count(*) from uniride.ur_user where u_login = %s"
-    conn = connect_pg.connect()
-    count = connect_pg.get_query(conn, query, (login,))[0][0]
-    if count:
-        raise InvalidInputException("LOGIN_TAKEN")
+    if check_taken:
+        _validate_not_taken(login=login)
 
 
-def _validate_student_email(studen_email) -> None:
+def _validate_student_email(studen_email, check_taken=True) -> None:
     """Check if the email is valid"""
 
     # check if exist
@@ -202,28 +288,31 @@ def _validate_student_email(studen_email) -> None:
         raise InvalidInputException("EMAIL_INVALID_DOMAIN")
 
     # check if the email is already taken
-    query = "select count(*) from uniride.ur_user where u_student_email = %s"
-    conn = connect_pg.connect()
-    count = connect_pg.get_query(conn, query, (studen_email,))[0][0]
-    if count:
-        raise InvalidInputException("EMAIL_TAKEN")
+    if check_taken:
+        _validate_not_taken(student_email=studen_email)
 
 
 def _hash_password(password) -> str:
     """Hash the password"""
-    salt = app.config["JWT_SALT"]
-    password = password.encode("utf8")
-    password = bcrypt.hashpw(password, salt)
-    # convert back to string
-    return str(password, "utf8")
+    return password_utils.hash_password(password)
 
 
 def _verify_password(password, hashed_password) -> bool:
     """Verify the password is correct"""
-    if not bcrypt.checkpw(password.encode("utf8"), hashed_password.encode("utf8")):
+    if not password_utils.check_password(password, hashed_password):
         raise PasswordIncorrectException()
 
 
+def _rehash_password_if_needed(user_id, password, hashed_password) -> None:
+    """Hash again a verified password stored with the legacy shared salt or an outdated cost"""
+    if not password_utils.needs_rehash(hashed_password):
+        return
+    query = "UPDATE uniride.ur_user SET u_password=%s WHERE u_id=%s"
+    conn = connect_pg.connect()
+    connect_pg.execute_command(conn, query, (_hash_password(password), user_id))
+    connect_pg.disconnect(conn)
+
+
 def save_pfp(user_id, pfp_file, profile_picture=None) -> None:
     """Save profil picture"""
     if not pfp_file:
@@ -232,17 +321,18 @@ def save_pfp(user_id, pfp_file, profile_picture=None) -> None:
     if pfp_file.filename == "":
         raise MissingInputException("MISSING_PFP_FILE")
 
-    allowed_extensions = ["png", "jpg", "jpeg"]
-    file_name = save_file(pfp_file, app.config["PFP_UPLOAD_FOLDER"], allowed_extensions, user_id)
+    file_name = save_file(pfp_file, "PFP_UPLOAD_FOLDER", PFP_ALLOWED_EXTENSIONS, user_id)
     try:
         if profile_picture and file_name != profile_picture:
-            delete_file(profile_picture, app.config["PFP_UPLOAD_FOLDER"])
+            delete_file(profile_picture, "PFP_UPLOAD_FOLDER")
     except FileNotFoundError:
         pass
     query = "UPDATE uniride.ur_user SET u_profile_picture=%s, u_timestamp_modification=CURRENT_TIMESTAMP WHERE u_id=%s"
     values = (file_name, user_id)
     conn = connect_pg.connect()
     connect_pg.execute_command(conn, query, values)
+    connect_pg.disconnect(conn)
+    user_cache.invalidate_user(user_id)
 
 
 def verify_student_email(student_email) -> None:
@@ -266,6 +356,7 @@ def verify_student_email(student_email) -> None:
 
     connect_pg.execute_command(conn, query, (student_email,))
     connect_pg.disconnect(conn)
+    user_cache.invalidate_user(email_verified[0][1])
 
     update_role(email_verified[0][1])
 
@@ -307,7 +398,7 @@ def _validate_gender(gender) -> None:
         raise InvalidInputException("GENDER_INVALID")
 
 
-def _validate_phone_number(phone_number) -> None:
+def _validate_phone_number(phone_number, check_taken=True) -> None:
     """Check if the phone number is valid"""
     if not phone_number:
         raise MissingInputException("PHONE_NUMBER_MISSING")
@@ -316,11 +407,8 @@ def _validate_phone_number(phone_number) -> None:
     if not phone_number.isdigit() or len(phone_number) != 10:
         raise InvalidInputException("PHONE_NUMBER_INVALID")
 
-    query = "select count(*) from uniride.ur_user where u_phone_number = %s"
-    conn = connect_pg.connect()
-    count = connect_pg.get_query(conn, query, (phone_number,))[0][0]
-    if count:
-        raise InvalidInputException("PHONE_NUMBER_TAKEN")
+    if check_taken:
+        _validate_not_taken(phone_number=phone_number)
 
 
 def _validate_description(description) -> None:
@@ -362,7 +450,7 @@ def _validate_password(password, password_confirmation) -> None:
 
 def change_password(user_id, old_password, new_password, new_password_confirmation) -> None:
     """Change password"""
-    user_bo = get_user_by_id(user_id)
+    user_bo = get_user_by_id(user_id, with_password=True)
     if not old_password:
         raise MissingInputException("PASSWORD_MISSING")
 
@@ -400,13 +488,21 @@ def change_student_email(user_id, student_email) -> None:
     if user_bo.student_email == student_email:
         raise AttributeUnchangedException("STUDENT_EMAIL")
 
-    _validate_student_email(student_email)
+    # the user can change the case of its own email
+    _validate_student_email(student_email, check_taken=False)
+    _validate_not_taken(student_email=student_email, user_id=user_id)
 
     query = "UPDATE uniride.ur_user SET u_student_email=%s, u_email_verified=false WHERE u_id=%s"
     values = (student_email, user_id)
     conn = connect_pg.connect()
-    connect_pg.execute_command(conn, query, values)
-    connect_pg.disconnect(conn)
+    try:
+        connect_pg.execute_command(conn, query, values)
+    except psycopg2.errors.UniqueViolation as e:
+        # the email was taken since the validation
+        raise InvalidInputException("EMAIL_TAKEN") from e
+    finally:
+        connect_pg.disconnect(conn)
+    user_cache.invalidate_user(user_id)
 
 
 def update_user_attribute(user_id, attribute_name, new_value, validation_func) -> None:
@@ -426,6 +522,7 @@ def update_user_attribute(user_id, attribute_name, new_value, validation_func) -
     conn = connect_pg.connect()
     connect_pg.execute_command(conn, query, values)
     connect_pg.disconnect(conn)
+    user_cache.invalidate_user(user_id)
 
 
 def change_login(user_id, login) -> None:
@@ -1,23 +1,33 @@
 """About utilities"""
 import os
+import json
+import hashlib
+from functools import lru_cache
 from uniride_sme import app
+from uniride_sme.utils import compression
 
 
-def get_conditions():
-    """Get conditions of use"""
-    file_path = os.path.join(app.config["PATH"], "resource/about/conditions_of_use.html")
+def _load_page(file_name, key):
+    """Load an about page once, with its JSON body already compressed and its ETag"""
+    file_path = os.path.join(app.config["PATH"], "resource/about", file_name)
 
     with open(file_path, "r", encoding="UTF-8") as html:
         content = html.read()
 
-    return content
+    body = json.dumps({key: content}).encode("utf-8")
+    bodies = {None: body, "gzip": compression.compress(body, "gzip")}
+    if compression.brotli is not None:
+        bodies["br"] = compression.compress(body, "br")
+    return {"bodies": bodies, "etag": hashlib.sha256(body).hexdigest()}
 
 
-def get_privacy():
-    """Get privacy of use"""
-    file_path = os.path.join(app.config["PATH"], "resource/about/privacy.html")
+_PAGES = {
+    "conditions": ("conditions_of_use.html", "conditions"),
+    "privacy": ("privacy.html", "privacy"),
+}
 
-    with open(file_path, "r", encoding="UTF-8") as html:
-        content = html.read()
 
-    return content
+@lru_cache(maxsize=None)
+def get_page(name):
+    """Get an about page, either "conditions" or "privacy", loaded on first use"""
+    return _load_page(*_PAGES[name])
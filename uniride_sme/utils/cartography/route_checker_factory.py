@@ -1,7 +1,7 @@
 """Factory for creating instances of RouteChecker"""
+from functools import lru_cache
 
-from uniride_sme.utils.cartography.google_maps_route_checker import GoogleMapsRouteChecker
-from uniride_sme.utils.cartography.open_street_map_route_checker import OpenStreetMapRouteChecker
+from uniride_sme import app
 from uniride_sme.utils.exception.exceptions import MissingInputException
 
 
@@ -10,11 +10,22 @@ class RouteCheckerFactory:
 
     @staticmethod
     def create_route_checker(route_checker_choice):
-        """Create an instance of RouteChecker"""
+        """Create an instance of RouteChecker, only the chosen implementation and its client library are imported"""
+        # pylint: disable=import-outside-toplevel
         if route_checker_choice == "google":
+            from uniride_sme.utils.cartography.google_maps_route_checker import GoogleMapsRouteChecker
+
             return GoogleMapsRouteChecker()
 
         if route_checker_choice == "osm":
+            from uniride_sme.utils.cartography.open_street_map_route_checker import OpenStreetMapRouteChecker
+
             return OpenStreetMapRouteChecker()
 
         raise MissingInputException("INVALID_ROUTE_CHECKER_CHOICE_ENVIRONMENT_VARIABLE")
+
+
+@lru_cache(maxsize=None)
+def get_route_checker():
+    """Get the route checker chosen with the ROUTE_CHECKER config variable, created on first use"""
+    return RouteCheckerFactory.create_route_checker(app.config["ROUTE_CHECKER"])
@@ -0,0 +1,59 @@
+"""HTTP compression related functions"""
+import gzip
+from flask import request
+from uniride_sme import app
+
+try:
+    import brotli
+except ImportError:  # brotli is an optional dependency, gzip is used without it
+    brotli = None
+
+
+def get_accepted_encoding(req):
+    """Get the best compression accepted by the client of the request, None if the client doesn't accept any"""
+    if brotli is not None and "br" in req.accept_encodings:
+        return "br"
+    if "gzip" in req.accept_encodings:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding, level=None):
+    """Compress the data with the encoding returned by get_accepted_encoding"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if level is None else level)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if level is None else level)
+    raise ValueError(f"Unsupported encoding {encoding}")
+
+
+def _is_compressible(response):
+    """Check if the response is a complete JSON or text body that can be compressed"""
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and (response.mimetype == "application/json" or response.mimetype.startswith("text/"))
+    )
+
+
+def compress_response(response):
+    """Add a weak ETag to the response, answer 304 if the client has it, else compress it when it is large enough"""
+    if request.method not in ("GET", "HEAD") or not _is_compressible(response):
+        return response
+
+    if "ETag" not in response.headers:
+        # the ETag is computed on the uncompressed body, a weak ETag stays valid for every encoding
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = get_accepted_encoding(request)
+    data = response.get_data()
+    if encoding and len(data) >= app.config["COMPRESS_MIN_SIZE"]:
+        response.set_data(compress(data, encoding, app.config["COMPRESS_LEVEL"][encoding]))
+        response.content_encoding = encoding
+    return response
@@ -1,14 +1,35 @@
 """Email related functions"""
 import os
 from flask_mail import Message
+from jinja2 import Environment, FileSystemLoader
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadTimeSignature
+from rq import Retry, get_current_job
 
 from uniride_sme import app, mail, rq
 from uniride_sme.utils.exception.exceptions import InvalidInputException
 from uniride_sme.utils.decorator import with_app_context
 
+# Email templates are compiled once at import, auto-escaping the variables
+_template_environment = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.dirname(__file__)), "resource", "email")),
+    autoescape=True,
+    auto_reload=True,
+)
+_templates = {
+    name: _template_environment.get_template(name) for name in _template_environment.list_templates(extensions=["html"])
+}
+
+
+def _render_template(template_name, **context):
+    """Render an email template, with EMAIL_TEMPLATES_AUTO_RELOAD the template is reloaded when modified"""
+    if app.config["EMAIL_TEMPLATES_AUTO_RELOAD"]:
+        template = _template_environment.get_template(template_name)
+    else:
+        template = _templates[template_name]
+    return template.render(**context)
+
 
-@rq.job  # TODO : add .queue when function called to use redis queue
+@rq.job
 @with_app_context
 def send_email(to, subject, template):
     """Send email"""
@@ -22,72 +43,125 @@ def send_email(to, subject, template):
     print("Email sent")
 
 
+@rq.job
+@with_app_context
+def send_bulk_email(messages):
+    """Send several emails through a single SMTP connection
+    :param messages: list of (to, subject, template)
+    """
+    sent = 0
+    try:
+        with mail.connect() as conn:
+            for to, subject, template in messages:
+                msg = Message(
+                    subject,
+                    recipients=[to],
+                    html=template,
+                    sender=app.config["MAIL_USERNAME"],
+                )
+                conn.send(msg)
+                sent += 1
+    except Exception:
+        # The job is retried, or moved to the dead letter queue, with the emails not sent yet only
+        job = get_current_job()
+        if job is not None:
+            job.args = (messages[sent:],)
+        raise
+    print(f"{len(messages)} emails sent")
+
+
+def move_to_dead_letter_queue(job, connection, exc_type, exc_value, traceback):  # pylint: disable=unused-argument
+    """Failure callback of the email jobs, the job is copied to the dead letter queue once it has no retries left.
+    No worker listens to this queue, failed emails can be inspected and replayed with
+    `flask rq worker <EMAIL_DEAD_LETTER_QUEUE>`
+    """
+    if job.retries_left:
+        return
+    rq.get_queue(app.config["EMAIL_DEAD_LETTER_QUEUE"]).enqueue_call(
+        job.func,
+        args=job.args,
+        kwargs=job.kwargs,
+        description=f"{job.description} failed: {exc_type.__name__}: {exc_value}",
+    )
+
+
+def _queue_email(email_job, *args):
+    """Enqueue an email job in the redis queue, with an exponential backoff between retries.
+    The worker must be started with the scheduler (`flask rq worker --with-scheduler`) to run the retries
+    """
+    max_retries = app.config["EMAIL_MAX_RETRIES"]
+    backoff = app.config["EMAIL_RETRY_BACKOFF"]
+    return rq.get_queue().enqueue_call(
+        email_job,
+        args=args,
+        retry=Retry(max=max_retries, interval=[backoff * 2**i for i in range(max_retries)]),
+        on_failure=move_to_dead_letter_queue,
+    )
+
+
 def send_verification_email(student_email, firstname, first_mail=False):
     """Send verification email"""
     if first_mail:
-        file_path = os.path.join(app.config["PATH"], "resource/email/email_welcome_template.html")
+        template_name = "email_welcome_template.html"
     else:
-        file_path = os.path.join(app.config["PATH"], "resource/email/email_verification_template.html")
+        template_name = "email_verification_template.html"
 
     url = app.config["FRONT_END_URL"] + "email/" + generate_token(student_email)
-    with open(file_path, "r", encoding="UTF-8") as html:
-        content = html.read().replace("{firstname}", firstname).replace("{url}", url)
-    send_email(student_email, "Vérifier votre adresse e-mail", content)
+    content = _render_template(template_name, firstname=firstname, url=url)
+    _queue_email(send_email, student_email, "Vérifier votre adresse e-mail", content)
 
 
 def send_password_change_email(student_email, firstname):
     """Send verification email"""
-    file_path = os.path.join(app.config["PATH"], "resource/email/email_password_change_template.html")
-
     url = app.config["FRONT_END_URL"] + "change-password/" + generate_token(student_email)
-    with open(file_path, "r", encoding="UTF-8") as html:
-        content = html.read().replace("{firstname}", firstname).replace("{url}", url)
-    send_email(student_email, "Réinitialiser votre mot de passe", content)
+    content = _render_template("email_password_change_template.html", firstname=firstname, url=url)
+    _queue_email(send_email, student_email, "Réinitialiser votre mot de passe", content)
 
 
 def send_reservation_response_email(student_email, firstname, trip_id):
     """Send reservation response email"""
-    file_path = os.path.join(app.config["PATH"], "resource/email/email_reservation_response_template.html")
-
     url = f"{app.config['FRONT_END_URL']}trips/{trip_id}"
+    content = _render_template("email_reservation_response_template.html", firstname=firstname, url=url)
 
-    with open(file_path, "r", encoding="UTF-8") as html:
-        content = html.read().replace("{firstname}", firstname).replace("{url}", url)
+    _queue_email(send_email, student_email, "Votre demande de réservation a reçu une réponse", content)
 
-    send_email(student_email, "Votre demande de réservation a reçu une réponse", content)
 
-
-def send_cancelation_email(student_email, firstname, trip_id):
-    """Send reservation response email"""
-    file_path = os.path.join(app.config["PATH"], "resource/email/email_cancelation_template.html")
+def send_cancelation_emails(passengers, trip_id):
+    """Send trip cancelation email to every passenger, in a single job
+    :param passengers: list of PassengerEmailsDTO
+    """
+    if not passengers:
+        return
 
     url = f"{app.config['FRONT_END_URL']}trips/{trip_id}"
 
-    with open(file_path, "r", encoding="UTF-8") as html:
-        content = html.read().replace("{firstname}", firstname).replace("{url}", url)
-
-    send_email(student_email, "Votre trajet a été annulé", content)
+    messages = [
+        (
+            passenger["email"],
+            "Votre trajet a été annulé",
+            _render_template("email_cancelation_template.html", firstname=passenger["firstname"], url=url),
+        )
+        for passenger in passengers
+    ]
+    _queue_email(send_bulk_email, messages)
 
 
 def send_document_validation_email(student_email, firstname, document_type, status):
     """Send document validation email"""
-    file_path = os.path.join(app.config["PATH"], "resource/email/email_document_validation_template.html")
-
     document_type = _get_document_type(document_type)
     status = _get_status(document_type, status)
 
     url = f"{app.config['FRONT_END_URL']}/profil-information"
 
-    with open(file_path, "r", encoding="UTF-8") as html:
-        content = (
-            html.read()
-            .replace("{firstname}", firstname)
-            .replace("{url}", url)
-            .replace("{document_type}", document_type["translation"])
-            .replace("{status}", status)
-        )
+    content = _render_template(
+        "email_document_validation_template.html",
+        firstname=firstname,
+        url=url,
+        document_type=document_type["translation"],
+        status=status,
+    )
 
-    send_email(student_email, f"Votre {document_type['translation']} a été {status}", content)
+    _queue_email(send_email, student_email, f"Votre {document_type['translation']} a été {status}", content)
 
 
 def _get_document_type(document_type):
@@ -43,3 +43,17 @@ class FileException(ApiException):
 
 class EmailException(ApiException):
     """Exception for email related errors"""
+
+
+class ServiceUnavailableException(ApiException):
+    """Exception for when the server is too busy to handle the request"""
+
+    def __init__(self, message):
+        super().__init__(message, 503)
+
+
+class TooManyRequestsException(ApiException):
+    """Exception for when the client made too many requests"""
+
+    def __init__(self, message):
+        super().__init__(message, 429)
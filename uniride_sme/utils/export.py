@@ -0,0 +1,93 @@
+"""Streaming exports of rows as JSON, NDJSON or CSV"""
+import csv
+import io
+from datetime import datetime
+from flask import Response, stream_with_context
+from uniride_sme import app
+from uniride_sme.utils.exception.exceptions import InvalidInputException
+
+EXPORT_MIMETYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# rows serialized together in each chunk of the response
+CHUNK_SIZE = 500
+
+
+def _chunks(rows):
+    """Group the rows in lists of CHUNK_SIZE rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_json(rows):
+    """Serialize the rows as a JSON array"""
+    yield "["
+    separator = ""
+    for chunk in _chunks(rows):
+        yield separator + ",".join(app.json.dumps(row) for row in chunk)
+        separator = ","
+    yield "]\n"
+
+
+def _write_ndjson(rows):
+    """Serialize the rows as a JSON object per line"""
+    for chunk in _chunks(rows):
+        yield "".join(app.json.dumps(row) + "\n" for row in chunk)
+
+
+def _write_csv(rows):
+    """Serialize the rows as CSV, the header is the columns of the first row"""
+    buffer = io.StringIO()
+    writer = None
+    for chunk in _chunks(rows):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(chunk[0].keys()))
+            writer.writeheader()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+_WRITERS = {"json": _write_json, "ndjson": _write_ndjson, "csv": _write_csv}
+
+
+def get_export_format(request):
+    """Get the export format of the "format" query parameter, "json" by default"""
+    export_format = request.args.get("format", "json")
+    if export_format not in _WRITERS:
+        raise InvalidInputException("INVALID_EXPORT_FORMAT")
+    return export_format
+
+
+def export_response(rows, export_format, name):
+    """Get a response streaming the rows, each chunk is serialized and sent while the next rows are fetched
+    :param rows: iterable of dict rows, e.g. from connect_pg.iter_query
+    :param name: name of the downloaded file, without extension
+    """
+    response = Response(stream_with_context(_WRITERS[export_format](rows)), mimetype=EXPORT_MIMETYPES[export_format])
+    response.headers["Content-Disposition"] = f'attachment; filename="{name}.{export_format}"'
+    return response
+
+
+def get_date_parameter(request, name):
+    """Get a date query parameter formatted as YYYY-MM-DD, None if it is missing"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError as e:
+        raise InvalidInputException("INVALID_DATE") from e
+
+
+def csv_response(chunks, name):
+    """Get a response streaming CSV data already serialized, e.g. from connect_pg.iter_copy"""
+    response = Response(stream_with_context(chunks), mimetype="text/csv")
+    response.headers["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return response
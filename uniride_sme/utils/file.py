@@ -1,29 +1,87 @@
 """File related functions"""
 import os
+import re
 import base64
+import hashlib
+from functools import lru_cache
+from flask import url_for
 from uniride_sme import app
 from uniride_sme.utils.exception.exceptions import FileException
+from uniride_sme.utils.storage.storage_factory import StorageFactory
+
+# name of a saved file, "{user_id}_{content_hash}.{extension}", the legacy files are named "{user_id}.{extension}"
+CONTENT_ADDRESSED_NAME = re.compile(r"\d+_(?P<hash>[0-9a-f]{32})\.\w+")
+
+
+@lru_cache(maxsize=None)
+def get_storage():
+    """Get the storage backend chosen with the STORAGE_BACKEND config variable"""
+    return StorageFactory.create_storage(app.config["STORAGE_BACKEND"])
 
 
 def allowed_file(filename, allowed_extensions):
     """Check if file's extension is allowed"""
+    if "." not in filename:
+        raise FileException("INVALID_FILE_EXTENSION", 422)
     extension = filename.rsplit(".", 1)[1].lower()
-    if "." not in filename or extension not in allowed_extensions:
+    if extension not in allowed_extensions:
         raise FileException("INVALID_FILE_EXTENSION", 422)
     return extension
 
 
-def save_file(file, directory, allowed_extensions, user_id):
-    """Save file"""
+def get_content_hash(data):
+    """Get the hash of the file content, it is also the ETag of the file"""
+    # md5 is used as a fingerprint, not for security, and matches the ETag computed by S3
+    return hashlib.md5(data, usedforsecurity=False).hexdigest()
+
+
+def save_file(file, location, allowed_extensions, user_id):
+    """Save file
+    :param location: upload folder config variable, e.g. "PFP_UPLOAD_FOLDER"
+    :return: the file name, "{user_id}_{content_hash}.{extension}"
+    """
     extension = allowed_file(file.filename, allowed_extensions)
-    file_name = f"{user_id}.{extension}"
-    file.save(os.path.join(directory, file_name))
+    data = file.read()
+    file_name = f"{user_id}_{get_content_hash(data)}.{extension}"
+    storage = get_storage()
+    if not storage.exists(file_name, location):
+        storage.save(data, file_name, location)
     return file_name
 
 
-def delete_file(file, directory):
+def delete_file(file_name, location):
     """Delete file"""
-    os.remove(os.path.join(directory, file))
+    get_storage().delete(file_name, location)
+
+
+def read_file(file_name, location):
+    """Read file content"""
+    if not file_name:
+        raise FileException("FILE_NOT_FOUND", 404)
+    try:
+        return get_storage().read(file_name, location)
+    except FileNotFoundError as e:
+        raise FileException("FILE_NOT_FOUND", 404) from e
+
+
+def file_exists(file_name, location):
+    """Check if the file exists"""
+    return bool(file_name) and get_storage().exists(file_name, location)
+
+
+def get_file_etag(file_name):
+    """Get the ETag of a saved file, the content hash is part of its name
+    :return: None for a legacy file, its name doesn't change with its content
+    """
+    match = CONTENT_ADDRESSED_NAME.fullmatch(file_name or "")
+    return match["hash"] if match else None
+
+
+def get_pfp_url(file_name):
+    """Get the URL of a profile picture, to avoid encoding it in the responses"""
+    if not file_name:
+        return ""
+    return url_for("user.get_profile_picture", file_name=file_name, _external=True)
 
 
 def get_encoded_file(file_name, file_location):
@@ -39,8 +97,9 @@ def get_encoded_file(file_name, file_location):
     if not file_name:
         return ""
 
-    file_path = os.path.join(str(app.config[file_location]), str(file_name))
-    if not os.path.isfile(file_path):
+    try:
+        data = get_storage().read(file_name, file_location)
+    except FileNotFoundError:
         return ""
 
     file_extension_part = os.path.splitext(file_name)[1].lstrip(".")
@@ -50,8 +109,7 @@ def get_encoded_file(file_name, file_location):
     else:
         prefix_url = "data:image/"
 
-    with open(file_path, "rb") as file:
-        file_data = base64.b64encode(file.read()).decode("utf-8")
+    file_data = base64.b64encode(data).decode("utf-8")
 
     prefix_url = prefix_url + file_extension_part + ";base64,"
     return prefix_url + file_data
@@ -0,0 +1,43 @@
+"""JSON provider of the application, serializing with orjson when it is installed"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider serializing with orjson, its output is the JSON of the default provider except that:
+    - the non string keys are sorted as strings, {10: .., 2: ..} is dumped as {"10": .., "2": ..}
+    - NaN and infinite floats are dumped as null instead of the invalid NaN and Infinity
+    The dates are passed to the default function so they keep the HTTP date format, the decimals are strings
+    """
+
+    def _option(self, indent=False):
+        """Get the orjson options matching the settings of the provider"""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON to a string, with the json module when it is given its own arguments"""
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON, with the json module when it is given its own arguments"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the arguments as a JSON response, the body is never decoded to a string"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._option(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
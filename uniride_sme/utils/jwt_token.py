@@ -1,7 +1,11 @@
 """JWT token utilities"""
+import time
 from datetime import datetime
-from flask_jwt_extended import get_jwt
-from uniride_sme import cache, jwt
+from flask import g, after_this_request, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, create_access_token, set_access_cookies
+from uniride_sme import app, cache, jwt
+from uniride_sme.utils.exception.exceptions import ForbiddenException
+from uniride_sme.utils.exception.user_exceptions import UserNotFoundException
 
 
 @jwt.token_in_blocklist_loader
@@ -12,6 +16,47 @@ def check_if_token_is_revoked(jwt_header, jwt_payload: dict):  # pylint: disable
     return token_in_redis is not None
 
 
+def _error_response(error_string, status_code):
+    """Get the response of a jwt error, its message formatted like the other messages
+    e.g. "Token has expired" -> "TOKEN_HAS_EXPIRED", "Missing cookie ..." -> "TOKEN_MISSING_COOKIE ..."
+    """
+    message = ""
+    if not error_string.lower().startswith("token"):
+        message = "TOKEN_"
+    message += error_string.split(":")[0].replace(" ", "_").upper()
+    return jsonify(message=message), status_code
+
+
+@jwt.expired_token_loader
+def expired_token_response(jwt_header, jwt_payload):  # pylint: disable=unused-argument
+    """Response when the token has expired"""
+    return _error_response("Token has expired", 401)
+
+
+@jwt.invalid_token_loader
+def invalid_token_response(error_string):
+    """Response when the token is invalid"""
+    return _error_response(error_string, 422)
+
+
+@jwt.unauthorized_loader
+def unauthorized_response(error_string):
+    """Response when the token is missing"""
+    return _error_response(error_string, 401)
+
+
+@jwt.revoked_token_loader
+def revoked_token_response(jwt_header, jwt_payload):  # pylint: disable=unused-argument
+    """Response when the token is revoked"""
+    return _error_response("Token has been revoked", 401)
+
+
+@jwt.needs_fresh_token_loader
+def needs_fresh_token_response(jwt_header, jwt_payload):  # pylint: disable=unused-argument
+    """Response when a fresh token is required"""
+    return _error_response("Fresh token required", 401)
+
+
 def revoke_token():
     """Revoke token"""
     token = get_jwt()
@@ -20,3 +65,80 @@ def revoke_token():
     time_remaining = expiration_datetime - current_time
     timeout = int(time_remaining.total_seconds()) + 1
     cache.set(token["jti"], "", timeout=timeout)
+
+
+@jwt.additional_claims_loader
+def add_token_version(identity):  # pylint: disable=unused-argument
+    """Add the creation time of the token, compared to the token version of the user"""
+    return {"ver": time.time()}
+
+
+def _token_version_key(user_id):
+    """Get the cache key of the token version of a user"""
+    return f"token_version:{user_id}"
+
+
+def bump_token_version(user_id):
+    """Make the tokens of a user stale, after a change of its role"""
+    # the tokens created before can't outlive the refresh token expiration
+    timeout = int(app.config["JWT_REFRESH_TOKEN_EXPIRES"].total_seconds())
+    cache.set(_token_version_key(user_id), time.time(), timeout=timeout)
+
+
+def get_fresh_identity(set_cookie=True):
+    """Get the identity of the token, reloaded if the tokens of the user are stale
+    :param set_cookie: set a new access token on the response when the identity is reloaded
+    """
+    if "fresh_identity" in g:
+        return g.fresh_identity
+
+    identity = get_jwt_identity()
+    version = cache.get(_token_version_key(identity["id"]))
+    if version is not None and get_jwt().get("ver", 0) < version:
+        # imported here, the user service depends on modules using this one
+        from uniride_sme.service import user_service  # pylint: disable=import-outside-toplevel
+
+        try:
+            # the cached user may be older than the role change, the local tiers of the other processes aren't cleared
+            user_bo = user_service.get_user_by_id(identity["id"], use_cache=False)
+        except UserNotFoundException as e:
+            raise ForbiddenException("INVALID_ROLE") from e
+        identity = {"id": user_bo.id, "role": user_bo.r_id}
+
+        if set_cookie:
+            access_token = create_access_token(identity)
+
+            @after_this_request
+            def set_fresh_access_token(response):
+                set_access_cookies(response, access_token)
+                return response
+
+    g.fresh_identity = identity
+    return identity
+
+
+def _sets_access_cookie(response):
+    """Check if the response already sets or unsets the access token cookie"""
+    prefix = app.config["JWT_ACCESS_COOKIE_NAME"] + "="
+    return any(cookie.startswith(prefix) for cookie in response.headers.getlist("Set-Cookie"))
+
+
+def refresh_expiring_jwts(response):
+    """Refresh the access token of a successful request when it expires within JWT_ACCESS_TOKEN_REFRESH"""
+    if response.status_code >= 400 or _sets_access_cookie(response):
+        return response
+    try:
+        token = get_jwt()
+    except RuntimeError:
+        # no token was verified in this request
+        return response
+    refresh_window = app.config["JWT_ACCESS_TOKEN_REFRESH"].total_seconds()
+    if token.get("type") != "access" or token["exp"] > time.time() + refresh_window:
+        return response
+
+    try:
+        access_token = create_access_token(get_fresh_identity(set_cookie=False))
+    except ForbiddenException:
+        return response
+    set_access_cookies(response, access_token)
+    return response
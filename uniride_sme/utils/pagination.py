@@ -30,10 +30,16 @@ def generate_pagination_metadata(page, page_size, total_count):
     }
 
 
+def get_pagination_parameters(request):
+    """Get the page and the page size requested, to paginate in the query"""
+    page = max(int(request.args.get("page", 1)), 1)
+    page_size = max(int(request.args.get("limit", 10)), 1)
+    return page, page_size
+
+
 def create_pagination(request, data):
     """Create pagination for the provided data"""
-    page = int(request.args.get("page", 1))
-    page_size = int(request.args.get("limit", 10))
+    page, page_size = get_pagination_parameters(request)
 
     start_index = (page - 1) * page_size
     end_index = start_index + page_size
@@ -0,0 +1,63 @@
+"""Password hashing functions, bcrypt runs in a bounded pool of threads"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from uniride_sme import app
+from uniride_sme.utils.exception.exceptions import ServiceUnavailableException
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_pool():
+    """Get the thread pool and the semaphore limiting the pending checks, created on first use"""
+    global _executor, _slots  # pylint: disable=global-statement
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config["PASSWORD_HASH_WORKERS"], thread_name_prefix="password"
+            )
+            _slots = threading.BoundedSemaphore(app.config["PASSWORD_HASH_MAX_PENDING"])
+        return _executor, _slots
+
+
+def reset_pool():
+    """Forget the thread pool, the threads don't survive a fork of the process"""
+    global _executor, _slots  # pylint: disable=global-statement
+    with _lock:
+        _executor = None
+        _slots = None
+
+
+def _run(func, *args):
+    """Run a bcrypt function in the pool, bcrypt releases the GIL so the other requests keep running"""
+    executor, slots = _get_pool()
+    # refuse at once instead of queueing when too many checks are pending
+    if not slots.acquire(blocking=False):
+        raise ServiceUnavailableException("PASSWORD_SERVICE_BUSY")
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password) -> str:
+    """Hash the password with its own salt"""
+    salt = bcrypt.gensalt(rounds=app.config["BCRYPT_ROUNDS"])
+    return _run(bcrypt.hashpw, password.encode("utf8"), salt).decode("utf8")
+
+
+def check_password(password, hashed_password) -> bool:
+    """Check the password matches the hash"""
+    return _run(bcrypt.checkpw, password.encode("utf8"), hashed_password.encode("utf8"))
+
+
+def needs_rehash(hashed_password) -> bool:
+    """Check if the hash uses the legacy shared salt or another cost than BCRYPT_ROUNDS"""
+    # the hash starts with the salt, "$2b$<cost>$" followed by 22 characters
+    salt = hashed_password[:29]
+    if salt == app.config["JWT_SALT"].decode("utf8"):
+        return True
+    parts = hashed_password.split("$")
+    return len(parts) == 4 and parts[2].isdigit() and int(parts[2]) != app.config["BCRYPT_ROUNDS"]
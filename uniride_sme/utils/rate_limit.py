@@ -0,0 +1,113 @@
+"""Rate limit of the authentication, with sliding window counters and a lockout stored in redis"""
+import math
+import time
+from flask import after_this_request
+from redis.exceptions import RedisError
+from uniride_sme import app, rq
+from uniride_sme.utils.exception.exceptions import InvalidInputException, TooManyRequestsException
+
+
+def _get_redis():
+    """Get the redis connection, the one of the job queue"""
+    return rq.connection
+
+
+def _failures_key(login):
+    """Get the key of the failed authentications of a login"""
+    return f"rate_limit:login:failures:{login.lower()}"
+
+
+def _lockout_key(login):
+    """Get the key of the lockout of a login"""
+    return f"rate_limit:login:lockout:{login.lower()}"
+
+
+def _hit(redis, key, limit, window):
+    """Count an attempt in a sliding window counter
+    The count is the count of the current fixed window, plus the count of the previous one weighted by its overlap
+    :return: the remaining attempts, negative when over the limit, and the seconds before the window resets
+    """
+    now = time.time()
+    current = int(now // window)
+    pipe = redis.pipeline()
+    pipe.incr(f"{key}:{current}")
+    pipe.expire(f"{key}:{current}", window * 2)
+    pipe.get(f"{key}:{current - 1}")
+    count, _, previous = pipe.execute()
+    weight = 1 - (now % window) / window
+    return limit - math.ceil(int(previous or 0) * weight + count), math.ceil(window - now % window)
+
+
+def _set_headers(headers):
+    """Set headers on the response of the request"""
+
+    @after_this_request
+    def set_rate_limit_headers(response):
+        response.headers.update(headers)
+        return response
+
+
+def check_login(ip_address, login):
+    """Count an authentication attempt, rejected before any db or bcrypt work when the ip or the login is limited
+    The X-RateLimit headers are the ones of the most limited of them
+    """
+    # the login comes from the JSON body, it can be of any type
+    if login is not None and not isinstance(login, str):
+        raise InvalidInputException("LOGIN_INVALID")
+
+    window = app.config["LOGIN_RATE_LIMIT_WINDOW"]
+    limits = {f"rate_limit:login:ip:{ip_address}": app.config["LOGIN_RATE_LIMIT_IP"]}
+    if login:
+        limits[f"rate_limit:login:login:{login.lower()}"] = app.config["LOGIN_RATE_LIMIT_LOGIN"]
+
+    try:
+        redis = _get_redis()
+        lockout = redis.ttl(_lockout_key(login)) if login else -2
+        hits = [(limit, *_hit(redis, key, limit, window)) for key, limit in limits.items()]
+    except RedisError as error:
+        # the authentication stays available when redis isn't
+        print(error)
+        return
+
+    limit, remaining, reset = min(hits, key=lambda hit: hit[1])
+    headers = {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(max(remaining, 0)),
+        "X-RateLimit-Reset": str(reset),
+    }
+    if lockout > 0:
+        _set_headers({**headers, "Retry-After": str(lockout)})
+        raise TooManyRequestsException("ACCOUNT_LOCKED")
+    if remaining < 0:
+        _set_headers({**headers, "Retry-After": str(reset)})
+        raise TooManyRequestsException("TOO_MANY_REQUESTS")
+    _set_headers(headers)
+
+
+def record_failure(login):
+    """Count a failed authentication of a login, locked out for LOGIN_LOCKOUT_DURATION seconds
+    when it reaches LOGIN_LOCKOUT_THRESHOLD failures
+    """
+    if not login:
+        return
+    duration = app.config["LOGIN_LOCKOUT_DURATION"]
+    try:
+        redis = _get_redis()
+        failures = redis.incr(_failures_key(login))
+        if failures == 1:
+            redis.expire(_failures_key(login), duration)
+        if failures >= app.config["LOGIN_LOCKOUT_THRESHOLD"]:
+            pipe = redis.pipeline()
+            pipe.set(_lockout_key(login), 1, ex=duration)
+            pipe.delete(_failures_key(login))
+            pipe.execute()
+    except RedisError as error:
+        print(error)
+
+
+def record_success(login):
+    """Reset the failed authentications of a login"""
+    try:
+        _get_redis().delete(_failures_key(login))
+    except RedisError as error:
+        print(error)
@@ -2,8 +2,9 @@
 from enum import Enum
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from uniride_sme.utils.exception.exceptions import ForbiddenException
+from uniride_sme.utils.jwt_token import get_fresh_identity
 
 
 class RoleUser(Enum):
@@ -23,7 +24,8 @@ def role_required(role: RoleUser = RoleUser.PASSENGER):
         @jwt_required()
         def wrapper(*args, **kwargs):
             try:
-                user_role = get_jwt_identity()["role"]
+                # the role of the token, unless the role of the user changed since
+                user_role = get_fresh_identity()["role"]
                 if role.value < user_role:
                     raise ForbiddenException("INVALID_ROLE")
                 return func(*args, **kwargs)
@@ -0,0 +1,45 @@
+"""Implementation of Storage using the local file system"""
+import os
+from werkzeug.utils import safe_join
+
+from uniride_sme.utils.storage.storage import Storage
+from uniride_sme import app
+
+
+class LocalStorage(Storage):
+    """Implementation of Storage using the local file system"""
+
+    def _get_path(self, file_name, location):
+        """Get the path of the file, refusing names escaping the upload folder"""
+        file_path = safe_join(str(app.config[location]), str(file_name))
+        if file_path is None:
+            raise FileNotFoundError(file_name)
+        return file_path
+
+    def save(self, data, file_name, location):
+        """Save the file content"""
+        file_path = self._get_path(file_name, location)
+        # Write in a temporary file first so readers never see a partially written file
+        tmp_file_path = f"{file_path}.tmp"
+        with open(tmp_file_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_file_path, file_path)
+
+    def read(self, file_name, location):
+        """Read the file content"""
+        file_path = self._get_path(file_name, location)
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(file_name)
+        with open(file_path, "rb") as file:
+            return file.read()
+
+    def exists(self, file_name, location):
+        """Check if the file exists"""
+        try:
+            return os.path.isfile(self._get_path(file_name, location))
+        except FileNotFoundError:
+            return False
+
+    def delete(self, file_name, location):
+        """Delete the file"""
+        os.remove(self._get_path(file_name, location))
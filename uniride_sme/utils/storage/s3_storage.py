@@ -0,0 +1,78 @@
+"""Implementation of Storage using an S3 compatible object storage (AWS S3, MinIO, ...)"""
+import mimetypes
+
+from uniride_sme.utils.storage.storage import Storage
+from uniride_sme import app
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 is an optional dependency, only needed for the s3 backend
+    boto3 = None
+    ClientError = None
+
+
+class S3Storage(Storage):
+    """Implementation of Storage using an S3 compatible object storage
+
+    Every API replica pointing to the same bucket shares the uploaded files.
+    S3_ENDPOINT_URL can target a local stand-in such as MinIO for development and tests.
+    """
+
+    def __init__(self, client=None):
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("boto3 must be installed to use the s3 storage backend")
+            client = boto3.client(
+                "s3",
+                endpoint_url=app.config["S3_ENDPOINT_URL"],
+                region_name=app.config["S3_REGION"],
+                aws_access_key_id=app.config["S3_ACCESS_KEY_ID"],
+                aws_secret_access_key=app.config["S3_SECRET_ACCESS_KEY"],
+            )
+        self.client = client
+        self.bucket = app.config["S3_BUCKET"]
+
+    @staticmethod
+    def _get_key(file_name, location):
+        """Get the object key, "PFP_UPLOAD_FOLDER" files are stored under "pfp/" """
+        prefix = location.removesuffix("_UPLOAD_FOLDER").lower()
+        return f"{prefix}/{file_name}"
+
+    @staticmethod
+    def _is_not_found(error):
+        """Check if the client error means the object doesn't exist"""
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def save(self, data, file_name, location):
+        """Save the file content"""
+        content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._get_key(file_name, location), Body=data, ContentType=content_type
+        )
+
+    def read(self, file_name, location):
+        """Read the file content"""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._get_key(file_name, location))
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(file_name) from e
+            raise
+        return response["Body"].read()
+
+    def exists(self, file_name, location):
+        """Check if the file exists"""
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._get_key(file_name, location))
+        except ClientError as e:
+            if self._is_not_found(e):
+                return False
+            raise
+        return True
+
+    def delete(self, file_name, location):
+        """Delete the file"""
+        if not self.exists(file_name, location):
+            raise FileNotFoundError(file_name)
+        self.client.delete_object(Bucket=self.bucket, Key=self._get_key(file_name, location))
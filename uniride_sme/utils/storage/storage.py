@@ -0,0 +1,27 @@
+"""Abstract class for storing uploaded files"""
+
+from abc import ABC, abstractmethod
+
+
+class Storage(ABC):
+    """Abstract class for storing uploaded files
+
+    Files are identified by their name and a location, the location being the name of the
+    upload folder config variable (e.g. "PFP_UPLOAD_FOLDER")
+    """
+
+    @abstractmethod
+    def save(self, data, file_name, location):
+        """Save the file content"""
+
+    @abstractmethod
+    def read(self, file_name, location):
+        """Read the file content, raise FileNotFoundError if the file doesn't exist"""
+
+    @abstractmethod
+    def exists(self, file_name, location):
+        """Check if the file exists"""
+
+    @abstractmethod
+    def delete(self, file_name, location):
+        """Delete the file, raise FileNotFoundError if the file doesn't exist"""
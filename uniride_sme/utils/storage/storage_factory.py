@@ -0,0 +1,20 @@
+"""Factory for creating instances of Storage"""
+
+from uniride_sme.utils.storage.local_storage import LocalStorage
+from uniride_sme.utils.storage.s3_storage import S3Storage
+from uniride_sme.utils.exception.exceptions import MissingInputException
+
+
+class StorageFactory:
+    """Factory for creating instances of Storage"""
+
+    @staticmethod
+    def create_storage(storage_choice):
+        """Create an instance of Storage"""
+        if storage_choice == "local":
+            return LocalStorage()
+
+        if storage_choice == "s3":
+            return S3Storage()
+
+        raise MissingInputException("INVALID_STORAGE_BACKEND_CHOICE_ENVIRONMENT_VARIABLE")
@@ -0,0 +1,101 @@
+"""Read-through cache of the users, with a local tier per process and a shared redis tier"""
+import dataclasses
+import threading
+import time
+from uniride_sme import app, cache
+from uniride_sme.model.bo.user_bo import UserBO
+
+# identifier column -> name in the cache keys
+_KEYS = {"u_id": "id", "u_login": "login", "u_student_email": "email"}
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _key(identifier, identifier_type):
+    """Get the cache key of a user identifier"""
+    return f"user:{_KEYS[identifier_type]}:{identifier}"
+
+
+def _get_local(key):
+    """Get a value of the local tier, None if missing or expired"""
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _local[key]
+            return None
+        return entry[1]
+
+
+def _set_local(key, value):
+    """Set a value of the local tier"""
+    with _local_lock:
+        if len(_local) >= app.config["USER_CACHE_LOCAL_MAX_SIZE"]:
+            # drop the oldest entry, dicts keep the insertion order
+            del _local[next(iter(_local))]
+        _local[key] = (time.monotonic() + app.config["USER_CACHE_LOCAL_TIMEOUT"], value)
+
+
+def _get(key):
+    """Get a value from the local tier, then from the redis tier"""
+    value = _get_local(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            _set_local(key, value)
+    return value
+
+
+def get_user(identifier, identifier_type) -> UserBO:
+    """Get a cached user, without its password, None if it is not cached"""
+    if identifier_type == "u_id":
+        user_id = identifier
+    else:
+        # the login and the email keys point to the id key
+        user_id = _get(_key(identifier, identifier_type))
+        if user_id is None:
+            return None
+
+    infos = _get(_key(user_id, "u_id"))
+    if infos is None:
+        return None
+    user_bo = UserBO(**infos)
+
+    # the login or the email may have changed since the key was set
+    if identifier_type == "u_login" and user_bo.login != identifier:
+        return None
+    if identifier_type == "u_student_email" and user_bo.student_email != identifier:
+        return None
+    return user_bo
+
+
+def set_user(user_bo: UserBO) -> None:
+    """Cache a user, its password is never cached"""
+    infos = dataclasses.asdict(dataclasses.replace(user_bo, password=None))
+    timeout = app.config["USER_CACHE_TIMEOUT"]
+    values = {
+        _key(user_bo.id, "u_id"): infos,
+        _key(user_bo.login, "u_login"): user_bo.id,
+        _key(user_bo.student_email, "u_student_email"): user_bo.id,
+    }
+    cache.set_many(values, timeout=timeout)
+    for key, value in values.items():
+        _set_local(key, value)
+
+
+def invalidate_user(user_id) -> None:
+    """Remove a user from the cache, after it has been modified
+    The local tiers of the other processes expire after USER_CACHE_LOCAL_TIMEOUT seconds
+    """
+    key = _key(user_id, "u_id")
+    cache.delete(key)
+    with _local_lock:
+        _local.pop(key, None)
+
+
+def clear() -> None:
+    """Clear the local tier"""
+    with _local_lock:
+        _local.clear()
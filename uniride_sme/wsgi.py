@@ -0,0 +1,18 @@
+"""Production entry point, served by gunicorn:
+$ gunicorn -c gunicorn.conf.py uniride_sme.wsgi:app
+"""
+from uniride_sme.rest_api import create_app
+from uniride_sme.utils import password, user_cache
+from uniride_sme.utils.cartography.route_checker_factory import get_route_checker
+from uniride_sme.utils.file import get_storage
+
+app = create_app()
+
+
+def init_worker():
+    """Initialize the pools and the caches of a worker, after it is forked from the preloaded application"""
+    # the threads of the pool aren't copied by the fork, and the storage and route clients aren't fork safe
+    password.reset_pool()
+    user_cache.clear()
+    get_storage.cache_clear()
+    get_route_checker.cache_clear()